@@ -0,0 +1,4 @@
+"""Benchmarks of the language learning pages and of the vendored jieba.
+
+Each script runs with `python -m benchmarks.<name>` from the repository root.
+"""
@@ -0,0 +1,168 @@
+"""Segmentation speed and memory of the vendored jieba.
+
+Every mode runs in a fresh interpreter, so that its peak RSS isn't shared
+with the other modes: default `cut`, `cut_all`, `cut` without the HMM,
+`cut_for_search` and `posseg.cut`. Each call segments one paragraph of a
+corpus, and the throughput in characters per second, the p50/p99 latency
+per call and the peak RSS are recorded. Two corpora are reproducible: the
+default text of the Mandarin page scaled up, and sentences of dictionary
+words drawn from a Zipf distribution. The import time of jieba and the
+cold start (import, building the prefix dictionary without a cache, first
+cut) are measured in separate interpreters.
+
+    python -m benchmarks.bench_jieba -o before.json
+    python -m benchmarks.bench_jieba -o after.json --compare before.json
+"""
+from argparse import SUPPRESS, ArgumentParser
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import (ROOT, compare, load_results, page_default_text, peak_rss_mb, percentile,
+                               print_table, scale_text, write_results, zipf_words)
+
+MODES = ["default", "cut_all", "no_hmm", "search", "posseg"]
+CORPORA = ["pages", "synthetic"]
+PARAGRAPH_CHARS = 200
+PUNCTUATION = "，，，。！？"
+METRICS = {
+    "chars_per_sec": "higher",
+    "p50_ms": "lower",
+    "p99_ms": "lower",
+    "peak_rss_mb": "lower",
+    "seconds": "lower",
+}
+
+
+def make_corpus(name, num_chars, seed=0):
+    """Return `name` as a list of paragraphs of about PARAGRAPH_CHARS characters."""
+    if name == "pages":
+        text = scale_text(page_default_text("Mandarin"), num_chars)
+    else:
+        import jieba
+        with jieba.get_dict_file() as f:
+            vocabulary = [line.decode("utf-8").split(" ")[0] for line in f]
+        rng = random.Random(seed)
+        parts = []
+        length = 0
+        for word in zipf_words(vocabulary, num_chars // 2, seed):
+            parts.append(word)
+            length += len(word)
+            if rng.random() < 0.1:
+                parts.append(rng.choice(PUNCTUATION))
+            if length >= num_chars:
+                break
+        text = "".join(parts)[:num_chars]
+    return [text[i:i + PARAGRAPH_CHARS] for i in range(0, len(text), PARAGRAPH_CHARS)]
+
+
+def get_cut(mode):
+    import jieba
+    import jieba.posseg
+    if mode == "default":
+        return jieba.lcut
+    elif mode == "cut_all":
+        return lambda text: jieba.lcut(text, cut_all=True)
+    elif mode == "no_hmm":
+        return lambda text: jieba.lcut(text, HMM=False)
+    elif mode == "search":
+        return jieba.lcut_for_search
+    else:
+        return jieba.posseg.lcut
+
+
+def run_mode(mode, corpus, num_chars, repeat):
+    """Time `mode` on `corpus` in this process; meant for a fresh interpreter."""
+    import jieba
+    jieba.setLogLevel(60)
+    paragraphs = make_corpus(corpus, num_chars)
+    cut = get_cut(mode)
+    jieba.initialize()
+    # the first call loads the HMM and POS tables
+    cut(paragraphs[0])
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for paragraph in paragraphs:
+            call_start = time.perf_counter()
+            cut(paragraph)
+            samples.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "corpus": corpus,
+        "mode": mode,
+        "chars": sum(map(len, paragraphs)) * repeat,
+        "calls": len(samples),
+        "chars_per_sec": sum(map(len, paragraphs)) * repeat / elapsed,
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_startup(step):
+    """Time importing jieba, or a cold start without the prefix dict cache."""
+    start = time.perf_counter()
+    import jieba
+    result = {"corpus": "-", "mode": step}
+    if step == "cold_start":
+        jieba.setLogLevel(60)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jieba.dt.tmp_dir = tmp_dir
+            jieba.lcut(page_default_text("Mandarin"))
+    result["seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_child(args):
+    command = [sys.executable, "-m", "benchmarks.bench_jieba", "--child"] + args
+    output = subprocess.run(command, cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the segmentation modes of jieba.")
+    parser.add_argument("-m", "--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("-c", "--corpora", nargs="+", choices=CORPORA, default=CORPORA)
+    parser.add_argument("-n", "--chars", type=int, default=50_000, help="characters per corpus")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="passes over each corpus")
+    parser.add_argument("-o", "--output", help="write the results to a JSON file")
+    parser.add_argument("--compare", metavar="JSON", help="compare the results with an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change flagged as a regression (default: 0.1)")
+    parser.add_argument("--child", nargs="+", help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child[0] == "startup":
+            result = run_startup(args.child[1])
+        else:
+            mode, corpus, num_chars, repeat = args.child
+            result = run_mode(mode, corpus, int(num_chars), int(repeat))
+        print(json.dumps(result))
+        return
+
+    results = [run_child(["startup", step]) for step in ["import", "cold_start"]]
+    for corpus in args.corpora:
+        for mode in args.modes:
+            results.append(run_child([mode, corpus, str(args.chars), str(args.repeat)]))
+
+    rows = [{key: f"{value:.4g}" if isinstance(value, float) else value for key, value in row.items()}
+            for row in results]
+    print_table(rows, ["corpus", "mode", "chars_per_sec", "p50_ms", "p99_ms", "seconds", "peak_rss_mb"])
+    if args.output:
+        write_results(args.output, "jieba", results)
+    if args.compare:
+        print()
+        regressions = compare(load_results(args.compare), {"results": results}, ["corpus", "mode"], METRICS,
+                              args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Top K selection of the jieba.analyse keyword extractors.
+
+Compares `top_tags`, which selects over NumPy arrays for large inputs, with
+a heap of all the terms and with sorting every candidate term. The term
+weights come from small (the default text of the Mandarin page), medium
+and book-length inputs, on which whole TF-IDF and TextRank extractions
+from segmented words are timed too. Inputs are segmented before timing.
+
+    python -m benchmarks.bench_keywords -o keywords.json
+"""
+from argparse import ArgumentParser
+import heapq
+from operator import itemgetter
+
+import jieba
+import jieba.analyse
+import jieba.posseg
+from jieba.analyse.tfidf import top_tags
+from benchmarks.common import measure, page_default_text, print_table, write_results, zipf_words
+
+# Number of dictionary words drawn for the synthetic inputs
+SIZES = {
+    "medium": 20_000,
+    "book": 300_000,
+}
+ALL_SIZES = ["small"] + list(SIZES)
+# Nouns and verbs, in the tag sets of both jieba and jieba-TW dictionaries
+ALLOW_POS = ("n", "ns", "vn", "v", "N", "Na", "Nb", "Nc", "Vi", "VC")
+
+
+def heap_tags(weights, topK=None, withWeight=False):
+    tags = heapq.nlargest(topK, weights.items(), key=itemgetter(1))
+    return tags if withWeight else [tag for tag, _ in tags]
+
+
+def sorted_tags(weights, topK=None, withWeight=False):
+    """The selection that `top_tags` replaces."""
+    tags = sorted(weights.items(), key=itemgetter(1), reverse=True)
+    if topK:
+        tags = tags[:topK]
+    return tags if withWeight else [tag for tag, _ in tags]
+
+
+def load_inputs(sizes):
+    postokenizer = jieba.posseg.dt
+    postokenizer.check_initialized()
+    inputs = {}
+    if "small" in sizes:
+        inputs["small"] = list(postokenizer.cut(page_default_text("Mandarin")))
+    word_tags = postokenizer.word_tag_tab
+    vocabulary = sorted(word_tags)
+    for name in sizes:
+        if name in SIZES:
+            words = zipf_words(vocabulary, SIZES[name], seed=len(name))
+            inputs[name] = [jieba.posseg.pair(word, word_tags[word]) for word in words]
+    return inputs
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the top K selection of jieba.analyse.")
+    parser.add_argument("-s", "--sizes", nargs="+", choices=ALL_SIZES, default=ALL_SIZES)
+    parser.add_argument("-k", "--top-k", type=int, default=20)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write the results to a JSON file")
+    args = parser.parse_args()
+
+    jieba.setLogLevel(60)
+    tfidf = jieba.analyse.TFIDF()
+    textrank = jieba.analyse.TextRank()
+    results = []
+    for size, words in load_inputs(args.sizes).items():
+        texts = [pair.word for pair in words]
+        for name, extract, doc in [
+            ("tfidf", tfidf.extract_tags_from_words, texts),
+            ("textrank", textrank.textrank_from_words, words),
+        ]:
+            kwargs = {"allowPOS": ALLOW_POS} if name == "textrank" else {}
+            weights = dict(extract(doc, topK=None, withWeight=True, **kwargs))
+            for selection, select in [("top_tags", top_tags), ("heap", heap_tags), ("sort", sorted_tags)]:
+                if select(weights, args.top_k, True) != sorted_tags(weights, args.top_k, True):
+                    raise AssertionError(f"{selection} selection differs from sorting on {size} {name}")
+                stats = measure(lambda: select(weights, args.top_k, True), args.repeat)
+                results.append({"size": size, "extractor": name, "step": f"select/{selection}",
+                                "tokens": len(words), "terms": len(weights), **stats})
+            stats = measure(lambda: extract(doc, topK=args.top_k, withWeight=True, **kwargs), args.repeat)
+            results.append({"size": size, "extractor": name, "step": "extract",
+                            "tokens": len(words), "terms": len(weights), **stats})
+
+    rows = [{**row, "p50_ms": f"{row['p50'] * 1000:.3f}", "p99_ms": f"{row['p99'] * 1000:.3f}"} for row in results]
+    print_table(rows, ["size", "extractor", "step", "tokens", "terms", "p50_ms", "p99_ms"])
+    if args.output:
+        write_results(args.output, "keywords", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Headless rerun times of the language pages, section by section.
+
+Each page runs in `streamlit.testing`'s AppTest with every HTTP request
+answered locally with a 404, so dictionary lookups cost what the page does
+with a miss and not what the network does. For each page:
+
+- first_run: the first run with the default text and sections, which loads
+  the model and other cached resources;
+- parse: a run on a new text with every section off;
+- base: a rerun of the same text with every section off;
+- one step per section, with only that section on: `cold` is the first run
+  on a new text, `warm` the rerun on the parsed doc, and `net` the warm time
+  minus the base rerun, i.e. what the section itself costs on a rerun;
+- all: every section on.
+
+Texts are the default text of each page scaled to the given sizes.
+
+    python -m benchmarks.bench_pages -o before.json
+    python -m benchmarks.bench_pages -o after.json --compare before.json
+"""
+from argparse import ArgumentParser
+import statistics
+import sys
+import time
+from unittest import mock
+
+import requests
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.common import compare, load_results, page_default_text, page_path, print_table, scale_text, write_results
+
+PAGES = ["Mandarin", "Japanese", "English", "German"]
+# Checkbox labels of the sections, and the names they are reported under
+SECTIONS = {
+    "關鍵詞分析": "keywords",
+    "增強文本": "analyzed_text",
+    "單詞解析": "lookups",
+    "詞形變化": "morphology",
+    "詞性分析": "gender",
+    "詞頻統計": "charts",
+    "命名實體": "ner",
+    "斷詞特徵": "tokens",
+    "文本分級": "profile",
+}
+# `net` is a difference of small timings, too noisy for a relative threshold
+METRICS = {"cold": "lower", "warm": "lower"}
+
+
+def offline_send(adapter, request, **kwargs):
+    response = requests.Response()
+    response.status_code = 404
+    response.reason = "Not Found (offline benchmark)"
+    response.url = request.url
+    response.request = request
+    response._content = b"{}"
+    return response
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    error = "; ".join(str(exc.message) for exc in at.exception)
+    return elapsed, error
+
+
+def set_sections(at, labels, enabled=()):
+    for checkbox in at.checkbox:
+        if checkbox.label in labels:
+            checkbox.set_value(checkbox.label in enabled)
+
+
+def warm_time(at, repeat):
+    samples = []
+    errors = set()
+    for _ in range(repeat):
+        elapsed, error = timed_run(at)
+        samples.append(elapsed)
+        if error:
+            errors.add(error)
+    return statistics.median(samples), "; ".join(sorted(errors))
+
+
+def bench_page(language, sizes, repeat, timeout):
+    at = AppTest.from_file(page_path(language), default_timeout=timeout)
+    elapsed, error = timed_run(at)
+    rows = [{"page": language, "size": "default", "step": "first_run", "cold": elapsed, "error": error}]
+    labels = [checkbox.label for checkbox in at.checkbox if checkbox.label in SECTIONS]
+    default_text = page_default_text(language)
+
+    variant = 0
+
+    def new_text(size):
+        # A text the session hasn't parsed yet, so that the doc isn't cached
+        nonlocal variant
+        variant += 1
+        at.text_area[0].set_value(f"{scale_text(default_text, size)}\n{variant}")
+
+    for size in sizes:
+        set_sections(at, labels)
+        new_text(size)
+        cold, error = timed_run(at)
+        rows.append({"page": language, "size": size, "step": "parse", "cold": cold, "error": error})
+        base, error = warm_time(at, repeat)
+        rows.append({"page": language, "size": size, "step": "base", "warm": base, "error": error})
+
+        for label in labels:
+            set_sections(at, labels, [label])
+            new_text(size)
+            cold, cold_error = timed_run(at)
+            warm, warm_error = warm_time(at, repeat)
+            rows.append({"page": language, "size": size, "step": SECTIONS[label],
+                         "cold": cold, "warm": warm, "net": warm - base,
+                         "error": cold_error or warm_error})
+
+        set_sections(at, labels, labels)
+        new_text(size)
+        cold, cold_error = timed_run(at)
+        warm, warm_error = warm_time(at, repeat)
+        rows.append({"page": language, "size": size, "step": "all", "cold": cold, "warm": warm,
+                     "net": warm - base, "error": cold_error or warm_error})
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the reruns of the language pages section by section.")
+    parser.add_argument("-p", "--pages", nargs="+", choices=PAGES, default=PAGES)
+    parser.add_argument("-s", "--sizes", nargs="+", type=int, default=[500, 5000],
+                        help="text sizes in characters")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="reruns per warm measurement")
+    parser.add_argument("-t", "--timeout", type=float, default=600, help="timeout of a run in seconds")
+    parser.add_argument("-o", "--output", help="write the results to a JSON file")
+    parser.add_argument("--compare", metavar="JSON", help="compare the results with an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change flagged as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    results = []
+    with mock.patch("requests.adapters.HTTPAdapter.send", offline_send):
+        for language in args.pages:
+            results.extend(bench_page(language, args.sizes, args.repeat, args.timeout))
+
+    rows = [{key: f"{value:.3f}" if isinstance(value, float) else value for key, value in row.items()}
+            for row in results]
+    print_table(rows, ["page", "size", "step", "cold", "warm", "net", "error"])
+    if args.output:
+        write_results(args.output, "pages", results)
+    if args.compare:
+        print()
+        regressions = compare(load_results(args.compare), {"results": results}, ["page", "size", "step"], METRICS,
+                              args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Inputs, timing and result files shared by the benchmark scripts.
+
+Inputs are reproducible: the default texts of the pages scaled to a number
+of characters, and sequences of dictionary words drawn from a Zipf
+distribution with a fixed seed. Results are written as JSON, and two result
+files of the same benchmark can be compared row by row.
+"""
+import ast
+from bisect import bisect_left
+import glob
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(ROOT, "pages")
+
+
+def page_path(language):
+    """Return the path of the page of `language`, e.g. "Mandarin"."""
+    paths = glob.glob(os.path.join(PAGES_DIR, f"*{language}.py"))
+    if not paths:
+        raise ValueError(f"No page for {language}")
+    return paths[0]
+
+
+def page_default_text(language):
+    """Return the DEFAULT_TEXT of a page without running it."""
+    with open(page_path(language), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "DEFAULT_TEXT" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"The {language} page has no DEFAULT_TEXT")
+
+
+def scale_text(text, num_chars):
+    """Repeat `text` up to exactly `num_chars` characters."""
+    repeats = -(-num_chars // len(text))
+    return (text * repeats)[:num_chars]
+
+
+def zipf_words(vocabulary, num_tokens, seed=0, exponent=1.0):
+    """Draw `num_tokens` words of `vocabulary`, the i-th with weight 1 / i ** exponent."""
+    cum_weights = list(itertools.accumulate(1.0 / rank ** exponent for rank in range(1, len(vocabulary) + 1)))
+    rng = random.Random(seed)
+    total = cum_weights[-1]
+    return [vocabulary[bisect_left(cum_weights, rng.random() * total)] for _ in range(num_tokens)]
+
+
+def percentile(sorted_samples, q):
+    index = min(len(sorted_samples) - 1, max(0, round(q * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def measure(func, repeat=5, warmup=1):
+    """Call `func` `warmup` + `repeat` times and summarize the timed calls in seconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "min": samples[0],
+        "p50": percentile(samples, 0.5),
+        "p99": percentile(samples, 0.99),
+        "mean": sum(samples) / len(samples),
+        "repeat": repeat,
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(path, benchmark, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": benchmark, "environment": environment(), "results": results},
+                  f, ensure_ascii=False, indent=2)
+
+
+def print_table(rows, columns):
+    widths = [max([len(str(column))] + [len(str(row.get(column, ""))) for row in rows]) for column in columns]
+    print("  ".join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(width) for column, width in zip(columns, widths)))
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old, new, keys, metrics, threshold=0.1):
+    """Print the relative change of `metrics` between the rows of two result files.
+
+    Rows are matched on the values of `keys`. `metrics` maps each metric to
+    "higher" or "lower", whichever is better. Changes for the worse larger
+    than `threshold` are flagged, and their number is returned.
+    """
+    old_rows = {tuple(row.get(key) for key in keys): row for row in old["results"]}
+    rows = []
+    regressions = 0
+    for row in new["results"]:
+        old_row = old_rows.get(tuple(row.get(key) for key in keys))
+        if old_row is None:
+            continue
+        for metric, better in metrics.items():
+            if metric not in row or metric not in old_row or not old_row[metric]:
+                continue
+            change = row[metric] / old_row[metric] - 1
+            worse = change < -threshold if better == "higher" else change > threshold
+            regressions += worse
+            rows.append({
+                **{key: row.get(key) for key in keys},
+                "metric": metric,
+                "old": f"{old_row[metric]:.4g}",
+                "new": f"{row[metric]:.4g}",
+                "change": f"{change:+.1%}",
+                "": "REGRESSION" if worse else "",
+            })
+    print_table(rows, list(keys) + ["metric", "old", "new", "change", ""])
+    return regressions
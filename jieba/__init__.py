@@ -310,6 +310,34 @@ class Tokenizer(object):
                     else:
                         yield x
 
+    def iter_subwords(self, word):
+        """
+        Yield (subword, start, end) for every dictionary word of at least two
+        characters inside `word`, other than `word` itself, ordered by length
+        and then by start. FREQ holds every prefix of a dictionary word, so it
+        is walked like a trie, one width at a time: a start is dropped at the
+        first fragment that no dictionary word begins with.
+        """
+        self.check_initialized()
+        get = self.FREQ.get
+        N = len(word)
+        # starts whose fragment of the current width is still a prefix
+        starts = xrange(N - 1)
+        for width in xrange(2, N):
+            prefixes = []
+            for k in starts:
+                if k + width > N:
+                    break
+                frag = word[k:k + width]
+                freq = get(frag)
+                if freq is not None:
+                    prefixes.append(k)
+                    if freq:
+                        yield (frag, k, k + width)
+            if not prefixes:
+                break
+            starts = prefixes
+
     def cut_for_search(self, sentence, HMM=True):
         """
         Finer segmentation for search engines.
@@ -317,15 +345,8 @@ class Tokenizer(object):
         words = self.cut(sentence, HMM=HMM)
         for w in words:
             if len(w) > 2:
-                for i in xrange(len(w) - 1):
-                    gram2 = w[i:i + 2]
-                    if self.FREQ.get(gram2):
-                        yield gram2
-            if len(w) > 3:
-                for i in xrange(len(w) - 2):
-                    gram3 = w[i:i + 3]
-                    if self.FREQ.get(gram3):
-                        yield gram3
+                for subword, _, _ in self.iter_subwords(w):
+                    yield subword
             yield w
 
     def lcut(self, *args, **kwargs):
@@ -461,15 +482,8 @@ class Tokenizer(object):
             for w in self.cut(unicode_sentence, HMM=HMM):
                 width = len(w)
                 if len(w) > 2:
-                    for i in xrange(len(w) - 1):
-                        gram2 = w[i:i + 2]
-                        if self.FREQ.get(gram2):
-                            yield (gram2, start + i, start + i + 2)
-                if len(w) > 3:
-                    for i in xrange(len(w) - 2):
-                        gram3 = w[i:i + 3]
-                        if self.FREQ.get(gram3):
-                            yield (gram3, start + i, start + i + 3)
+                    for subword, i, j in self.iter_subwords(w):
+                        yield (subword, start + i, start + j)
                 yield (w, start, start + width)
                 start += width
 
@@ -499,6 +513,7 @@ del_word = dt.del_word
 get_DAG = dt.get_DAG
 get_dict_file = dt.get_dict_file
 initialize = dt.initialize
+iter_subwords = dt.iter_subwords
 load_userdict = dt.load_userdict
 set_dictionary = dt.set_dictionary
 suggest_freq = dt.suggest_freq
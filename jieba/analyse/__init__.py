@@ -10,8 +10,12 @@ default_tfidf = TFIDF()
 default_textrank = TextRank()
 
 extract_tags = tfidf = default_tfidf.extract_tags
+extract_tags_from_words = default_tfidf.extract_tags_from_words
+extract_tags_many = default_tfidf.extract_tags_many
 set_idf_path = default_tfidf.set_idf_path
 textrank = default_textrank.extract_tags
+textrank_from_words = default_textrank.textrank_from_words
+textrank_many = default_textrank.extract_tags_many
 
 def set_stop_words(stop_words_path):
     default_tfidf.set_stop_words(stop_words_path)
@@ -4,8 +4,12 @@ from whoosh.analysis import RegexAnalyzer, LowercaseFilter, StopFilter, StemFilt
 from whoosh.analysis import Tokenizer, Token
 from whoosh.lang.porter import stem
 
+import os
 import jieba
 import re
+import threading
+from collections import OrderedDict
+from hashlib import md5
 
 STOP_WORDS = frozenset(('a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can',
                         'for', 'from', 'have', 'if', 'in', 'is', 'it', 'may',
@@ -16,14 +20,116 @@ STOP_WORDS = frozenset(('a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can',
 accepted_chars = re.compile(r"[\u4E00-\u9FD5]+")
 
 
+class TokenCache(object):
+    """
+    LRU cache of the tokens of whole field values, keyed by a hash of the
+    value, so that unchanged documents aren't segmented again on reindexing.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '<TokenCache size=%d maxsize=%d>' % (len(self.data), self.maxsize)
+
+    @staticmethod
+    def key(text, HMM=True):
+        return md5(text.encode('utf-8')).digest(), HMM
+
+    def get(self, key):
+        with self.lock:
+            tokens = self.data.get(key)
+            if tokens is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.data.move_to_end(key)
+            return tokens
+
+    def put(self, key, tokens):
+        with self.lock:
+            self.data[key] = tokens
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = 0
+
+
+token_cache = TokenCache()
+
+
+def tokenize_text(text, HMM=True):
+    """
+    The (word, start, end) tuples that ChineseTokenizer indexes for `text`.
+    """
+    return tuple((w, start, end) for (w, start, end) in jieba.tokenize(text, mode="search", HMM=HMM)
+                 if accepted_chars.match(w) or len(w) > 1)
+
+
+def _tokenize_item(item):
+    key, text = item
+    return key, tokenize_text(text, key[1])
+
+
+def prime_cache(texts, HMM=True, processnum=None, chunksize=16):
+    """
+    Segment `texts` in parallel worker processes and store their tokens in
+    token_cache, so that adding them to an index only reads the cache.
+    Texts already in the cache are skipped. Like jieba.enable_parallel,
+    this only works on posix.
+    """
+    if os.name == 'nt':
+        raise NotImplementedError(
+            "jieba: parallel mode only supports posix system")
+    from multiprocessing import cpu_count, get_context
+    jieba.dt.check_initialized()
+    items = ((key, text) for key, text in
+             ((TokenCache.key(text, HMM), text) for text in texts)
+             if key not in token_cache.data)
+    # forked workers segment with the user dictionaries and add_word changes
+    # of this process, whatever the default start method is
+    pool = get_context('fork').Pool(processnum or cpu_count())
+    try:
+        for key, tokens in pool.imap_unordered(_tokenize_item, items, chunksize):
+            token_cache.put(key, tokens)
+    finally:
+        pool.close()
+        pool.join()
+
+
 class ChineseTokenizer(Tokenizer):
+    # defaults of the tokenizers pickled in the schemas of older indexes
+    HMM = True
+    cache = True
+
+    def __init__(self, HMM=True, cache=True):
+        self.HMM = HMM
+        self.cache = cache
+
+    def __eq__(self, other):
+        return (other and self.__class__ is other.__class__
+                and self.HMM == other.HMM and self.cache == other.cache)
 
     def __call__(self, text, **kargs):
-        words = jieba.tokenize(text, mode="search")
+        # queries are short and rarely repeated, so only indexed values are cached
+        if self.cache and kargs.get("mode") != "query":
+            key = TokenCache.key(text, self.HMM)
+            words = token_cache.get(key)
+            if words is None:
+                words = tokenize_text(text, self.HMM)
+                token_cache.put(key, words)
+        else:
+            words = tokenize_text(text, self.HMM)
         token = Token()
         for (w, start_pos, stop_pos) in words:
-            if not accepted_chars.match(w) and len(w) <= 1:
-                continue
             token.original = token.text = w
             token.pos = start_pos
             token.startchar = start_pos
@@ -31,7 +137,12 @@ class ChineseTokenizer(Tokenizer):
             yield token
 
 
-def ChineseAnalyzer(stoplist=STOP_WORDS, minsize=1, stemfn=stem, cachesize=50000):
-    return (ChineseTokenizer() | LowercaseFilter() |
+def ChineseAnalyzer(stoplist=STOP_WORDS, minsize=1, stemfn=stem, cachesize=50000, HMM=True, cache=True):
+    """
+    - HMM: whether to find new words with the Hidden Markov Model. Turning it
+           off speeds up bulk indexing; queries should then use HMM=False too.
+    - cache: whether to cache the tokens of each field value in token_cache.
+    """
+    return (ChineseTokenizer(HMM=HMM, cache=cache) | LowercaseFilter() |
             StopFilter(stoplist=stoplist, minsize=minsize) |
             StemFilter(stemfn=stemfn, ignore=None, cachesize=cachesize))
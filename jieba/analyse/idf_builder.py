@@ -0,0 +1,184 @@
+# encoding=utf-8
+"""
+Build IDF tables for TFIDF from a corpus.
+
+Documents are segmented with jieba.cut in several processes and the number
+of documents containing each word is added to a DocumentFrequencies store,
+which can be saved and updated again later as new documents arrive. The
+IDF table is written as the binary file that IDFLoader memory-maps
+(see IDFFile in tfidf.py):
+
+    header   magic, version, number of words, median IDF
+    entries  (key offset, key length, idf) per word, sorted by key
+    keys     the UTF-8 encoded words
+
+    python -m jieba.analyse.idf_builder corpus/ -s df.cache -o idf.bin -j 8
+"""
+from __future__ import absolute_import, unicode_literals
+import os
+import sys
+import marshal
+import tempfile
+from math import log
+from argparse import ArgumentParser
+import jieba
+from .tfidf import ENTRY, HEADER, IDF_MAGIC, IDF_VERSION
+from .._compat import *
+
+if os.name == 'nt':
+    from shutil import move as _replace_file
+else:
+    _replace_file = os.rename
+
+
+def _dump_atomic(path, write):
+    # prevent moving across different filesystems
+    fd, fpath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, 'wb') as f:
+        write(f)
+    _replace_file(fpath, path)
+
+
+def write_idf_file(path, idf_freq):
+    """
+    Write the {word: idf} mapping `idf_freq` as a binary IDF file.
+    """
+    items = sorted((word.encode('utf-8'), idf) for word, idf in iteritems(idf_freq))
+    values = sorted(idf for _, idf in items)
+    median_idf = values[len(values) // 2] if values else 0.0
+
+    def write(f):
+        f.write(HEADER.pack(IDF_MAGIC, IDF_VERSION, len(items), median_idf))
+        offset = 0
+        for key, idf in items:
+            f.write(ENTRY.pack(offset, len(key), idf))
+            offset += len(key)
+        for key, _ in items:
+            f.write(key)
+
+    _dump_atomic(path, write)
+    return len(items)
+
+
+def _doc_words(text):
+    return list(set(w for w in jieba.cut(text) if w.strip()))
+
+
+class DocumentFrequencies(object):
+    """
+    Number of documents and document frequency of each word, kept in a
+    marshal file so that a corpus can be counted in several runs.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.n_docs = 0
+        self.df = {}
+        if path and os.path.isfile(path):
+            self.load(path)
+
+    def __repr__(self):
+        return '<DocumentFrequencies docs=%d words=%d>' % (self.n_docs, len(self.df))
+
+    def add(self, words):
+        df = self.df
+        for w in words:
+            df[w] = df.get(w, 0) + 1
+        self.n_docs += 1
+
+    def update(self, texts, processnum=1, chunksize=64):
+        """
+        Segment each text of `texts` and count it as one document.
+        Texts are streamed, so a corpus never has to fit in memory.
+        """
+        jieba.dt.check_initialized()
+        if processnum == 1:
+            for text in texts:
+                self.add(_doc_words(text))
+            return
+        if os.name == 'nt':
+            raise NotImplementedError(
+                "jieba: parallel mode only supports posix system")
+        from multiprocessing import cpu_count, get_context
+        # forked workers segment with the dictionary loaded here (e.g. -D),
+        # whatever the default start method is
+        pool = get_context('fork').Pool(processnum or cpu_count())
+        try:
+            for words in pool.imap_unordered(_doc_words, texts, chunksize):
+                self.add(words)
+        finally:
+            pool.close()
+            pool.join()
+
+    def load(self, path):
+        with open(path, 'rb') as f:
+            self.n_docs, self.df = marshal.load(f)
+
+    def save(self, path=None):
+        path = path or self.path
+        _dump_atomic(path, lambda f: marshal.dump((self.n_docs, self.df), f))
+
+    def idf(self, min_df=1):
+        logdocs = log(self.n_docs or 1)
+        return dict((w, logdocs - log(n)) for w, n in iteritems(self.df) if n >= min_df)
+
+    def write_idf(self, path, min_df=1):
+        return write_idf_file(path, self.idf(min_df))
+
+
+def iter_texts(paths, by_line=False):
+    for path in paths:
+        if os.path.isdir(path):
+            filenames = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names if name.endswith('.txt'))
+        else:
+            filenames = [path]
+        for filename in filenames:
+            with open(filename, 'rb') as f:
+                if by_line:
+                    for line in f:
+                        line = line.decode('utf-8').strip()
+                        if line:
+                            yield line
+                else:
+                    yield f.read().decode('utf-8')
+
+
+def main():
+    parser = ArgumentParser(usage="%s -m jieba.analyse.idf_builder [options] path [path ...]" % sys.executable,
+                            description="Build a binary IDF file for jieba.analyse from a corpus.")
+    parser.add_argument("paths", nargs='*', help="text files or directories of .txt files")
+    parser.add_argument("-o", "--output", help="write the IDF file to OUTPUT")
+    parser.add_argument("-s", "--store",
+                        help="load the document frequencies from STORE if it exists, and save them back to it")
+    parser.add_argument("-l", "--by-line", action="store_true", default=False,
+                        help="count each non-empty line as a document")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of processes, 0 for all cores (default: 1)")
+    parser.add_argument("-m", "--min-df", type=int, default=1,
+                        help="leave out words found in less than MIN_DF documents (default: 1)")
+    parser.add_argument("-D", "--dict", help="use DICT as dictionary")
+    parser.add_argument("-q", "--quiet", action="store_true", default=False,
+                        help="don't print loading messages to stderr")
+    args = parser.parse_args()
+
+    if not args.output and not args.store:
+        parser.error("at least one of --output and --store is required")
+    if args.quiet:
+        jieba.setLogLevel(60)
+    if args.dict:
+        jieba.initialize(args.dict)
+
+    store = DocumentFrequencies(args.store)
+    store.update(iter_texts(args.paths, args.by_line), args.jobs)
+    if args.store:
+        store.save()
+    if args.output:
+        count = store.write_idf(args.output, args.min_df)
+        print("Wrote the IDF of %d words from %d documents to %s" % (count, store.n_docs, args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,18 +3,39 @@
 
 from __future__ import absolute_import, unicode_literals
 import sys
-from operator import itemgetter
 from collections import defaultdict
 import jieba.posseg
-from .tfidf import KeywordExtractor
+from .tfidf import KeywordExtractor, top_tags
 from .._compat import *
 
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# weight of a co-occurrence of two words `distance` tokens apart
+WEIGHTINGS = {
+    'count': lambda distance: 1.0,
+    'decay': lambda distance: 1.0 / distance,
+}
+
 
 class UndirectWeightedGraph:
     d = 0.85
+    # convergence of the sparse ranking
+    tol = 1.0e-6
+    max_iter = 100
 
     def __init__(self):
         self.graph = defaultdict(list)
+        self.iterations = 0
+        self.residual = None
 
     def addEdge(self, start, end, weight):
         # use a tuple (start, end, weight) instead of a Edge object
@@ -22,6 +43,47 @@ class UndirectWeightedGraph:
         self.graph[end].append((end, start, weight))
 
     def rank(self):
+        if sparse is not None and self.graph:
+            return self.rank_sparse()
+        return self.rank_loop()
+
+    def rank_sparse(self):
+        """
+        Power iteration over a CSR matrix of the edge weights divided by
+        the out-degree of their source, until the largest change of a node
+        weight is below `tol`.
+        """
+        nodes = sorted(self.graph.keys())
+        index = dict((n, i) for i, n in enumerate(nodes))
+        rows, cols, weights = [], [], []
+        for n, out in self.graph.items():
+            i = index[n]
+            for e in out:
+                rows.append(i)
+                cols.append(index[e[1]])
+                weights.append(e[2])
+        size = len(nodes)
+        adjacency = sparse.csr_matrix(
+            (np.array(weights, dtype=np.float64), (rows, cols)), shape=(size, size))
+        outSum = np.asarray(adjacency.sum(axis=0)).ravel()
+        transition = adjacency.dot(sparse.diags(1.0 / outSum)).tocsr()
+
+        ws = np.full(size, 1.0 / size)
+        residual = 0.0
+        for x in xrange(1, self.max_iter + 1):
+            new_ws = (1 - self.d) + self.d * transition.dot(ws)
+            residual = float(np.abs(new_ws - ws).max())
+            ws = new_ws
+            if residual < self.tol:
+                break
+        self.iterations, self.residual = x, residual
+
+        min_rank, max_rank = ws.min(), ws.max()
+        # to unify the weights, don't *100.
+        ws = (ws - min_rank / 10.0) / (max_rank - min_rank / 10.0)
+        return dict(zip(nodes, ws.tolist()))
+
+    def rank_loop(self):
         ws = defaultdict(float)
         outSum = defaultdict(float)
 
@@ -32,12 +94,17 @@ class UndirectWeightedGraph:
 
         # this line for build stable iteration
         sorted_keys = sorted(self.graph.keys())
+        residual = 0.0
         for x in xrange(10):  # 10 iters
+            residual = 0.0
             for n in sorted_keys:
                 s = 0
                 for e in self.graph[n]:
                     s += e[2] / outSum[e[1]] * ws[e[1]]
-                ws[n] = (1 - self.d) + self.d * s
+                w = (1 - self.d) + self.d * s
+                residual = max(residual, abs(w - ws[n]))
+                ws[n] = w
+        self.iterations, self.residual = 10 if self.graph else 0, residual
 
         (min_rank, max_rank) = (sys.float_info[0], sys.float_info[3])
 
@@ -61,11 +128,68 @@ class TextRank(KeywordExtractor):
         self.stop_words = self.STOP_WORDS.copy()
         self.pos_filt = frozenset(('ns', 'n', 'vn', 'v'))
         self.span = 5
+        # a name of WEIGHTINGS, or a function of the distance between the words
+        self.weighting = 'count'
+        # iterations and residual of the last ranking
+        self.iterations = 0
+        self.residual = None
 
     def pairfilter(self, wp):
         return (wp.flag in self.pos_filt and len(wp.word.strip()) >= 2
                 and wp.word.lower() not in self.stop_words)
 
+    def window_weights(self):
+        weighting = self.weighting
+        if not callable(weighting):
+            weighting = WEIGHTINGS[weighting]
+        return [weighting(distance) for distance in xrange(1, self.span)]
+
+    def count_cooccurrences(self, words, withFlag=False):
+        """
+        Return (word, word, weight) for the words that pass pairfilter and
+        occur less than `span` tokens apart, with the weights of every
+        co-occurrence summed.
+        """
+        span = self.span
+        if span < 2 or not words:
+            return []
+        # filter each token once and map the kept ones to integer ids
+        ids = {}
+        keys = []
+        token_ids = np.full(len(words) + span - 1, -1, dtype=np.int64)
+        for i, wp in enumerate(words):
+            if self.pairfilter(wp):
+                key = wp if withFlag else wp.word
+                if key not in ids:
+                    ids[key] = len(keys)
+                    keys.append(key)
+                token_ids[i] = ids[key]
+        # one row per token: the token, then the `span - 1` tokens after it
+        windows = sliding_window_view(token_ids, span)[:len(words)]
+        start = np.broadcast_to(windows[:, :1], (len(words), span - 1))
+        end = windows[:, 1:]
+        weights = np.broadcast_to(np.array(self.window_weights()), end.shape)
+        valid = (start >= 0) & (end >= 0)
+        codes = start[valid] * len(keys) + end[valid]
+        codes, inverse = np.unique(codes, return_inverse=True)
+        totals = np.bincount(inverse, weights=weights[valid], minlength=len(codes))
+        return [(keys[code // len(keys)], keys[code % len(keys)], w)
+                for code, w in zip(codes.tolist(), totals.tolist())]
+
+    def count_cooccurrences_loop(self, words, withFlag=False):
+        weights = self.window_weights()
+        keep = [self.pairfilter(wp) for wp in words]
+        cm = defaultdict(float)
+        for i, wp in enumerate(words):
+            if keep[i]:
+                for j in xrange(i + 1, min(i + self.span, len(words))):
+                    if keep[j]:
+                        if withFlag:
+                            cm[(wp, words[j])] += weights[j - i - 1]
+                        else:
+                            cm[(wp.word, words[j].word)] += weights[j - i - 1]
+        return [(start, end, w) for (start, end), w in cm.items()]
+
     def textrank(self, sentence, topK=20, withWeight=False, allowPOS=('ns', 'n', 'vn', 'v'), withFlag=False):
         """
         Extract keywords from sentence using TextRank algorithm.
@@ -78,33 +202,26 @@ class TextRank(KeywordExtractor):
             - withFlag: if True, return a list of pair(word, weight) like posseg.cut
                         if False, return a list of words
         """
+        words = self.tokenizer.cut(sentence)
+        return self.textrank_from_words(words, topK, withWeight, allowPOS, withFlag)
+
+    def textrank_from_words(self, words, topK=20, withWeight=False, allowPOS=('ns', 'n', 'vn', 'v'), withFlag=False):
+        """
+        Same as textrank, for a sentence that is already segmented and tagged.
+        `words` is a sequence of posseg pairs.
+        """
         self.pos_filt = frozenset(allowPOS)
         g = UndirectWeightedGraph()
-        cm = defaultdict(int)
-        words = tuple(self.tokenizer.cut(sentence))
-        for i, wp in enumerate(words):
-            if self.pairfilter(wp):
-                for j in xrange(i + 1, i + self.span):
-                    if j >= len(words):
-                        break
-                    if not self.pairfilter(words[j]):
-                        continue
-                    if allowPOS and withFlag:
-                        cm[(wp, words[j])] += 1
-                    else:
-                        cm[(wp.word, words[j].word)] += 1
-
-        for terms, w in cm.items():
-            g.addEdge(terms[0], terms[1], w)
-        nodes_rank = g.rank()
-        if withWeight:
-            tags = sorted(nodes_rank.items(), key=itemgetter(1), reverse=True)
+        words = tuple(words)
+        if np is not None:
+            cooccurrences = self.count_cooccurrences(words, withFlag and allowPOS)
         else:
-            tags = sorted(nodes_rank, key=nodes_rank.__getitem__, reverse=True)
-
-        if topK:
-            return tags[:topK]
-        else:
-            return tags
+            cooccurrences = self.count_cooccurrences_loop(words, withFlag and allowPOS)
+        for start, end, w in cooccurrences:
+            g.addEdge(start, end, w)
+        nodes_rank = g.rank()
+        self.iterations, self.residual = g.iterations, g.residual
+        return top_tags(nodes_rank, topK, withWeight)
 
     extract_tags = textrank
+    extract_tags_from_words = textrank_from_words
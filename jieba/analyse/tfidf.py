@@ -1,9 +1,20 @@
 # encoding=utf-8
 from __future__ import absolute_import
 import os
+import mmap
+import heapq
+import struct
+import threading
 import jieba
 import jieba.posseg
+from math import log
 from operator import itemgetter
+from .._compat import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 _get_module_path = lambda path: os.path.normpath(os.path.join(os.getcwd(),
                                                  os.path.dirname(__file__), path))
@@ -11,6 +22,17 @@ _get_abs_path = jieba._get_abs_path
 
 DEFAULT_IDF = _get_module_path("idf.txt")
 
+# binary IDF files, written by idf_builder
+IDF_MAGIC = b"JIDF"
+IDF_VERSION = 1
+HEADER = struct.Struct("<4sIId")
+ENTRY = struct.Struct("<IId")
+
+
+def is_idf_file(path):
+    with open(path, 'rb') as f:
+        return f.read(len(IDF_MAGIC)) == IDF_MAGIC
+
 
 class KeywordExtractor(object):
 
@@ -31,6 +53,93 @@ class KeywordExtractor(object):
     def extract_tags(self, *args, **kwargs):
         raise NotImplementedError
 
+    def extract_tags_from_words(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def prepare(self):
+        """
+        Load everything extraction needs, so that forked workers share it.
+        """
+        self.tokenizer.check_initialized()
+        self.postokenizer.check_initialized()
+
+    def extract_tags_many(self, docs, topK=20, withWeight=False, allowPOS=None, withFlag=False,
+                          n_jobs=1, chunksize=16):
+        """
+        Extract keywords from each document of `docs`, yielding the results
+        in input order. A document is either a string, or a sequence of words
+        that are already segmented (posseg pairs when allowPOS is used), which
+        skips segmentation. allowPOS defaults to the one of extract_tags.
+        With n_jobs other than 1 (0 or None for all cores), the documents are
+        spread over a pool of forked processes. This only works on posix.
+        """
+        kwargs = dict(topK=topK, withWeight=withWeight, withFlag=withFlag)
+        if allowPOS is not None:
+            kwargs['allowPOS'] = allowPOS
+        if n_jobs == 1:
+            for doc in docs:
+                yield self._extract_one(doc, kwargs)
+            return
+        if os.name == 'nt':
+            raise NotImplementedError(
+                "jieba: parallel mode only supports posix system")
+        from multiprocessing import cpu_count, get_context
+        self.prepare()
+        # forked workers inherit the extractor through initargs instead of
+        # unpickling it, whatever the default start method is
+        pool = get_context('fork').Pool(n_jobs or cpu_count(), initializer=_init_worker,
+                                        initargs=(self, kwargs))
+        try:
+            for tags in pool.imap(_extract_worker, docs, chunksize):
+                yield tags
+        finally:
+            pool.terminate()
+
+    def _extract_one(self, doc, kwargs):
+        if isinstance(doc, string_types):
+            return self.extract_tags(doc, **kwargs)
+        return self.extract_tags_from_words(doc, **kwargs)
+
+
+_worker_task = None
+
+
+def _init_worker(extractor, kwargs):
+    global _worker_task
+    _worker_task = (extractor, kwargs)
+
+
+def _extract_worker(doc):
+    extractor, kwargs = _worker_task
+    return extractor._extract_one(doc, kwargs)
+
+
+# below this many terms, sorting them all is as fast as any selection
+NUMPY_MIN_TERMS = 1000
+
+
+def top_tags(weights, topK=None, withWeight=False):
+    """
+    The topK keys of `weights` by decreasing weight, with their weights if
+    withWeight is True. Ties keep the order of `weights`, as with
+    sorted(..., reverse=True)[:topK], but the terms are not all sorted.
+    """
+    if not topK or topK >= len(weights) or len(weights) < NUMPY_MIN_TERMS:
+        tags = sorted(iteritems(weights), key=itemgetter(1), reverse=True)[:topK or None]
+    elif np is not None:
+        keys = list(weights)
+        values = np.fromiter(itervalues(weights), dtype=np.float64, count=len(keys))
+        kth = np.partition(values, len(values) - topK)[len(values) - topK]
+        candidates = np.flatnonzero(values >= kth)
+        # by decreasing weight, then by position in `weights`
+        order = candidates[np.lexsort((candidates, -values[candidates]))][:topK]
+        tags = [(keys[i], weights[keys[i]]) for i in order.tolist()]
+    else:
+        tags = heapq.nlargest(topK, iteritems(weights), key=itemgetter(1))
+    if withWeight:
+        return tags
+    return [tag for tag, _ in tags]
+
 
 class IDFLoader(object):
 
@@ -44,6 +153,11 @@ class IDFLoader(object):
     def set_new_path(self, new_idf_path):
         if self.path != new_idf_path:
             self.path = new_idf_path
+            if is_idf_file(new_idf_path):
+                # binary IDF files are memory-mapped and carry their median
+                self.idf_freq = IDFFile(new_idf_path)
+                self.median_idf = self.idf_freq.median_idf
+                return
             content = open(new_idf_path, 'rb').read().decode('utf-8')
             self.idf_freq = {}
             for line in content.splitlines():
@@ -56,20 +170,120 @@ class IDFLoader(object):
         return self.idf_freq, self.median_idf
 
 
+class IDFFile(object):
+    """
+    Read-only {word: idf} mapping over a memory-mapped binary IDF file:
+
+        header   magic, version, number of words, median IDF
+        entries  (key offset, key length, idf) per word, sorted by key
+        keys     the UTF-8 encoded words
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.median_idf = HEADER.unpack_from(self.buf, 0)
+        if magic != IDF_MAGIC or version != IDF_VERSION:
+            raise ValueError("jieba: not a binary IDF file: " + path)
+        self.keys_start = HEADER.size + self.count * ENTRY.size
+
+    def __repr__(self):
+        return '<IDFFile path=%r words=%d>' % (self.path, self.count)
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, i):
+        offset, length, idf = ENTRY.unpack_from(self.buf, HEADER.size + i * ENTRY.size)
+        start = self.keys_start + offset
+        return self.buf[start:start + length], idf
+
+    def get(self, word, default=None):
+        key = word.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, idf = self._entry(mid)
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return idf
+        return default
+
+    def __getitem__(self, word):
+        idf = self.get(word)
+        if idf is None:
+            raise KeyError(word)
+        return idf
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def close(self):
+        self.buf.close()
+
+
+class DictIDFLoader(object):
+    """
+    IDF derived from the word frequencies of a tokenizer's dictionary,
+    idf(w) = log(total / freq(w)), used when no idf.txt is available.
+    The table is computed once per dictionary and shared by all loaders.
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.path = ""
+
+    def get_idf(self):
+        tokenizer = self.tokenizer
+        with self._lock:
+            idf = self._cache.get(tokenizer.dictionary)
+            if idf is None:
+                tokenizer.check_initialized()
+                logtotal = log(tokenizer.total)
+                # prefixes of dictionary words are stored with a frequency of 0
+                idf_freq = dict((word, logtotal - log(freq))
+                                for word, freq in iteritems(tokenizer.FREQ) if freq)
+                median_idf = sorted(itervalues(idf_freq))[len(idf_freq) // 2]
+                idf = self._cache[tokenizer.dictionary] = (idf_freq, median_idf)
+        return idf
+
+
 class TFIDF(KeywordExtractor):
 
     def __init__(self, idf_path=None):
         self.tokenizer = jieba.dt
         self.postokenizer = jieba.posseg.dt
         self.stop_words = self.STOP_WORDS.copy()
-        self.idf_loader = IDFLoader(idf_path or DEFAULT_IDF)
-        self.idf_freq, self.median_idf = self.idf_loader.get_idf()
+        if idf_path or os.path.isfile(DEFAULT_IDF):
+            self.idf_loader = IDFLoader(idf_path or DEFAULT_IDF)
+        else:
+            self.idf_loader = DictIDFLoader(self.tokenizer)
+        # loaded on first use, so that importing jieba.analyse stays cheap
+        self.idf_freq, self.median_idf = None, 0.0
+
+    def check_idf(self):
+        if self.idf_freq is None:
+            self.idf_freq, self.median_idf = self.idf_loader.get_idf()
+
+    def prepare(self):
+        KeywordExtractor.prepare(self)
+        self.check_idf()
 
     def set_idf_path(self, idf_path):
         new_abs_path = _get_abs_path(idf_path)
         if not os.path.isfile(new_abs_path):
             raise Exception("jieba: file does not exist: " + new_abs_path)
-        self.idf_loader.set_new_path(new_abs_path)
+        if isinstance(self.idf_loader, IDFLoader):
+            self.idf_loader.set_new_path(new_abs_path)
+        else:
+            self.idf_loader = IDFLoader(new_abs_path)
         self.idf_freq, self.median_idf = self.idf_loader.get_idf()
 
     def extract_tags(self, sentence, topK=20, withWeight=False, allowPOS=(), withFlag=False):
@@ -86,10 +300,19 @@ class TFIDF(KeywordExtractor):
                         if False, return a list of words
         """
         if allowPOS:
-            allowPOS = frozenset(allowPOS)
             words = self.postokenizer.cut(sentence)
         else:
             words = self.tokenizer.cut(sentence)
+        return self.extract_tags_from_words(words, topK, withWeight, allowPOS, withFlag)
+
+    def extract_tags_from_words(self, words, topK=20, withWeight=False, allowPOS=(), withFlag=False):
+        """
+        Same as extract_tags, for a sentence that is already segmented.
+        `words` is a sequence of strings, or of posseg pairs if allowPOS is set.
+        """
+        self.check_idf()
+        if allowPOS:
+            allowPOS = frozenset(allowPOS)
         freq = {}
         for w in words:
             if allowPOS:
@@ -106,11 +329,4 @@ class TFIDF(KeywordExtractor):
             kw = k.word if allowPOS and withFlag else k
             freq[k] *= self.idf_freq.get(kw, self.median_idf) / total
 
-        if withWeight:
-            tags = sorted(freq.items(), key=itemgetter(1), reverse=True)
-        else:
-            tags = sorted(freq, key=freq.__getitem__, reverse=True)
-        if topK:
-            return tags[:topK]
-        else:
-            return tags
+        return top_tags(freq, topK, withWeight)
@@ -1,27 +1,41 @@
-from collections import Counter
-from dragonmapper import hanzi, transcriptions
 import jieba
 import pandas as pd
 import plotly.express as px
 import re
 import requests 
 import spacy
-from spacy_streamlit import visualize_ner, visualize_tokens
 #from spacy.language import Language
 from spacy.tokens import Doc
 import streamlit as st
+from utils import pinyin_table, profiler, profiling, tocfl, transcription
+from utils.analysis import DocAnalysis
+from utils.charts import MAX_BARS, get_freq_fig, show_long_tail
+from utils.keywords import MAX_KEYWORDS, extract_chinese_keywords
+from utils.pipeline import get_doc
+from utils.render import render_sentences
+from utils.window import visualize_ner_window, visualize_tokens_window
 
 # Global variables
 DEFAULT_TEXT = "我如此的過著孤單的生活，我沒有一個可以真正跟他談話的人，一直到六年前，我在撒哈拉沙漠飛機故障的時候。我的發動機裡有些東西壞了。而由於我身邊沒有機械師，也沒有乘客，我準備獨自去嘗試一次困難的修理。這對我是生死問題。我連足夠喝八天的水都沒有。頭一天晚上我在離開有人居住的地方一千英里的沙地上睡覺。我比一位漂流在汪洋大海裡的木筏上面的遇難者更孤單。當天剛破曉的時候，我被一種奇異的小聲音叫醒，你可以想像到，這時我是多麼的驚訝。那聲音說：「請你﹒﹒﹒給我畫一隻綿羊！」「哪！」「給我畫一隻綿羊！」《小王子》"
 DESCRIPTION = "AI模型輔助語言學習：華語"
 TOK_SEP = " | "
 PUNCT_SYM = ["PUNCT", "SYM"]
+KW_METHODS = {
+    "TF-IDF": "tfidf",
+    "TextRank": "textrank",
+}
+PRONUNCIATIONS = {
+    "漢語拼音": "pinyin",
+    "注音符號": "zhuyin",
+    "國際音標": "ipa",
+}
 MODEL_NAME = "zh_core_web_sm"
 
 # External API callers
 def moedict_caller(word):
     st.write(f"### {word}")
-    req = requests.get(f"https://www.moedict.tw/uni/{word}.json")
+    with profiling.span("api/moedict"):
+        req = requests.get(f"https://www.moedict.tw/uni/{word}.json")
     try:
         definitions = req.json().get('heteronyms')[0].get('definitions')
         df = pd.DataFrame(definitions)
@@ -58,152 +72,184 @@ class JiebaTokenizer:
         return doc
     
 # Utility functions
-def filter_tokens(doc):
-    clean_tokens = [tok for tok in doc if tok.pos_ not in PUNCT_SYM]
-    clean_tokens = (
-        [tok for tok in clean_tokens if 
-         not tok.like_email and 
-         not tok.like_num and 
-         not tok.like_url and 
-         not tok.is_space]
-    )
-    return clean_tokens
-
-def get_vocab(doc):
-    clean_tokens = filter_tokens(doc)
+def get_vocab(analysis):
     alphanum_pattern = re.compile(r"[a-zA-Z0-9]")
-    clean_tokens_text = [tok.text for tok in clean_tokens if not alphanum_pattern.search(tok.text)]
-    vocab = list(set(clean_tokens_text))
+    vocab = [word for word in analysis.vocab if not alphanum_pattern.search(word)]
     return vocab
 
-def get_counter(doc):
-    clean_tokens = filter_tokens(doc)
-    tokens = [token.text for token in clean_tokens]
-    counter = Counter(tokens)
-    return counter
-
-def get_freq_fig(doc):
-    counter = get_counter(doc)
-    counter_df = (
-        pd.DataFrame.from_dict(counter, orient='index').
-        reset_index().
-        rename(columns={
-            0: 'count', 
-            'index': 'word'
-            }).
-        sort_values(by='count', ascending=False)
-        )
-    fig = px.bar(counter_df, x='word', y='count')
-    return fig
-
-def get_level_pie(tocfl_result):
-    level = tocfl_result['詞條分級'].value_counts()
-    fig = px.pie(tocfl_result, 
-                values=level.values, 
+def format_sentence(idx, sent, transcriber, system):
+    tokens_text = [tok.text for tok in sent if tok.pos_ not in PUNCT_SYM]
+    sounds = transcriber.transcribe(tokens_text, system)
+
+    display = []
+    for text, sound in zip(tokens_text, sounds):
+        res = f"{text} [{sound}]"
+        display.append(res)
+    if display:
+        display_text = TOK_SEP.join(display)
+        return f"{idx+1} >>> {display_text}"
+    else:
+        return f"{idx+1} >>> EMPTY LINE"
+
+def create_kw_section(nlp, doc):
+    st.markdown("## 關鍵詞分析")
+    method = st.radio("請選擇關鍵詞演算法", list(KW_METHODS))
+    kw_num = st.slider("請選擇關鍵詞數量", 1, MAX_KEYWORDS, 3)
+    keywords = extract_chinese_keywords(nlp, doc, KW_METHODS[method], n=kw_num)
+    for count, (keyword, weight) in enumerate(keywords, 1):
+        st.write(f"{count} >>> {keyword} ({round(weight, 3)})")
+
+def get_level_pie(level):
+    fig = px.pie(values=level.values, 
                 names=level.index, 
                 title='詞彙分級圓餅圖')
     return fig
 
-@st.cache
-def load_tocfl_table(filename="./tocfl_wordlist.csv"):
-    table = pd.read_csv(filename)
-    cols = "詞彙 漢語拼音 注音 任務領域 詞條分級".split()
-    table = table[cols]
-    return table
-       
+@st.cache_resource
+def load_tocfl_index():
+    return tocfl.get_index()
+
+@st.cache_resource
+def load_transcriber():
+    return transcription.TranscriptionService(load_tocfl_index(), pinyin_table.load_table())
+
+@st.cache_resource
+def load_model(tokenizer):
+    nlp = spacy.load(MODEL_NAME)
+    # Add pipelines to spaCy
+    # nlp.add_pipe("merge_entities") # Merge entity spans to tokens
+    if tokenizer == "jieba-TW":
+        nlp.tokenizer = JiebaTokenizer(nlp.vocab)
+    return nlp
+
 # Page setting
 st.set_page_config(
     page_icon="🤠",
     layout="wide",
     initial_sidebar_state="auto",
 )
+profiling.start_run("Mandarin")
 st.markdown(f"# {DESCRIPTION}") 
 
-# Load the model
-nlp = spacy.load(MODEL_NAME)
-          
-# Add pipelines to spaCy
-# nlp.add_pipe("yake") # keyword extraction
-# nlp.add_pipe("merge_entities") # Merge entity spans to tokens
-
 # Select a tokenizer if the Chinese model is chosen
 selected_tokenizer = st.radio("請選擇斷詞模型", ["jieba-TW", "spaCy"])
-if selected_tokenizer == "jieba-TW":
-    nlp.tokenizer = JiebaTokenizer(nlp.vocab)
+
+# Load the model
+with profiling.span("model_load"):
+    nlp = load_model(selected_tokenizer)
 
 # Page starts from here
 st.markdown("## 待分析文本")     
 st.info("請在下面的文字框輸入文本並按下Ctrl + Enter以更新分析結果")
 text = st.text_area("",  DEFAULT_TEXT, height=200)
-doc = nlp(text)
 st.markdown("---")
 
 st.info("請勾選以下至少一項功能")
-# keywords_extraction = st.sidebar.checkbox("關鍵詞分析", False) # YAKE doesn't work for Chinese texts
+keywords_extraction = st.checkbox("關鍵詞分析", False)
 analyzed_text = st.checkbox("增強文本", True)
 defs_examples = st.checkbox("單詞解析", True)
 # morphology = st.sidebar.checkbox("詞形變化", True)
 freq_count = st.checkbox("詞頻統計", True)
 ner_viz = st.checkbox("命名實體", True)
 tok_table = st.checkbox("斷詞特徵", False)
+corpus_profile = st.checkbox("文本分級", False)
+
+features = [name for name, enabled in [
+    ("keywords_extraction", keywords_extraction),
+    ("analyzed_text", analyzed_text),
+    ("defs_examples", defs_examples),
+    ("freq_count", freq_count),
+    ("ner_viz", ner_viz),
+    ("tok_table", tok_table),
+    ("corpus_profile", corpus_profile),
+] if enabled]
+with profiling.span("get_doc"):
+    doc = get_doc(nlp, text, features, key=MODEL_NAME)
+analysis = DocAnalysis(doc)
+
+if keywords_extraction:
+    with profiling.span("section/keywords_extraction"):
+        create_kw_section(nlp, doc)
 
 if analyzed_text:
-    st.markdown("## 增強文本") 
-    pronunciation = st.radio("請選擇輔助發音類型", ["漢語拼音", "注音符號", "國際音標"])
-    for idx, sent in enumerate(doc.sents):
-        tokens_text = [tok.text for tok in sent if tok.pos_ not in PUNCT_SYM]
-        pinyins = [hanzi.to_pinyin(word) for word in tokens_text]
-        sounds = pinyins
-        if pronunciation == "注音符號":
-            zhuyins = [transcriptions.pinyin_to_zhuyin(word) for word in pinyins]
-            sounds = zhuyins
-        elif pronunciation == "國際音標":
-            ipas = [transcriptions.pinyin_to_ipa(word) for word in pinyins]
-            sounds = ipas
-
-        display = []
-        for text, sound in zip(tokens_text, sounds):
-            res = f"{text} [{sound}]"
-            display.append(res)
-        if display:
-            display_text = TOK_SEP.join(display)
-            st.write(f"{idx+1} >>> {display_text}")
-        else:
-            st.write(f"{idx+1} >>> EMPTY LINE")
+    with profiling.span("section/analyzed_text"):
+        st.markdown("## 增強文本") 
+        pronunciation = st.radio("請選擇輔助發音類型", list(PRONUNCIATIONS))
+        transcriber = load_transcriber()
+        system = PRONUNCIATIONS[pronunciation]
+        render_sentences(
+            doc,
+            lambda idx, sent: format_sentence(idx, sent, transcriber, system),
+            key="analyzed_text",
+        )
+        stats = transcriber.stats()
+        st.caption(f"發音快取命中率: {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
 
 if defs_examples:
-    st.markdown("## 單詞解析")
-    vocab = get_vocab(doc)
-    if vocab:
-        tocfl_table = load_tocfl_table()
-        filt = tocfl_table['詞彙'].isin(vocab)
-        tocfl_res = tocfl_table[filt]
-        st.markdown("### 華語詞彙分級")
-        fig = get_level_pie(tocfl_res)
-        st.plotly_chart(fig, use_container_width=True)
-
-        with st.expander("點擊 + 查看結果"):
-            st.table(tocfl_res)
+    with profiling.span("section/defs_examples"):
+        st.markdown("## 單詞解析")
+        vocab = get_vocab(analysis)
+        if vocab:
+            tocfl_index = load_tocfl_index()
+            tocfl_res = tocfl_index.levels_for(vocab)
+            st.markdown("### 華語詞彙分級")
+            fig = get_level_pie(tocfl_index.level_counts(tocfl_res.index))
+            st.plotly_chart(fig, use_container_width=True)
+
+            with st.expander("點擊 + 查看結果"):
+                st.table(tocfl_res)
+            st.markdown("---")
+            st.markdown("### 單詞解釋與例句")
+            selected_words = st.multiselect("請選擇要查詢的單詞: ", vocab, vocab[-1])
+            for w in selected_words:
+                moedict_caller(w)                        
+
+if freq_count:
+    with profiling.span("section/freq_count"):
+        st.markdown("## 詞頻統計")  
+        frequencies = analysis.frequencies
+        topK = st.slider('請選擇前K個高頻詞', 1, len(frequencies), 5)
+        most_common = frequencies.most_common(topK)
+        st.write(most_common)
         st.markdown("---")
-        st.markdown("### 單詞解釋與例句")
-        selected_words = st.multiselect("請選擇要查詢的單詞: ", vocab, vocab[-1])
-        for w in selected_words:
-            moedict_caller(w)                        
-
-if freq_count:  
-    st.markdown("## 詞頻統計")  
-    counter = get_counter(doc)
-    topK = st.slider('請選擇前K個高頻詞', 1, len(counter), 5)
-    most_common = counter.most_common(topK)
-    st.write(most_common)
-    st.markdown("---")
-
-    fig = get_freq_fig(doc)
-    st.plotly_chart(fig, use_container_width=True)
+
+        top_n = st.slider('請選擇圖表顯示的詞數 (其餘合併為「其他」)', 1, MAX_BARS, 20)
+        webgl = st.checkbox("使用 WebGL 繪圖", False)
+        fig = get_freq_fig(frequencies, top_n, webgl=webgl)
+        st.plotly_chart(fig, use_container_width=True)
+        if len(frequencies) > top_n:
+            with st.expander("點擊 + 查看其他詞頻"):
+                show_long_tail(frequencies, top_n)
 
 if ner_viz:
-    ner_labels = nlp.get_pipe("ner").labels
-    visualize_ner(doc, labels=ner_labels, show_table=False, title="命名實體")
-    
+    with profiling.span("section/ner_viz"):
+        ner_labels = nlp.get_pipe("ner").labels
+        visualize_ner_window(doc, labels=ner_labels, title="命名實體")
+
 if tok_table:
-    visualize_tokens(doc, attrs=["text", "pos_", "tag_", "dep_", "head"], title="斷詞特徵")
+    with profiling.span("section/tok_table"):
+        visualize_tokens_window(doc, title="斷詞特徵")
+
+if corpus_profile:
+    with profiling.span("section/corpus_profile"):
+        st.markdown("## 文本分級")
+        uploaded_files = st.file_uploader("請上傳要分級的文本 (.txt)，未上傳時分析上方文本", type="txt", accept_multiple_files=True)
+        if uploaded_files:
+            docs = []
+            for f in uploaded_files:
+                try:
+                    docs.append((f.name, f.getvalue().decode("utf-8")))
+                except UnicodeDecodeError:
+                    st.error(f"{f.name} 不是 UTF-8 編碼的文本，已略過")
+        else:
+            docs = [("待分析文本", doc.text)]
+        profile_df = profiler.profile_table(docs)
+        st.dataframe(profile_df)
+        csv = profile_df.to_csv(index=False).encode('utf-8')
+        st.download_button(
+          label="下載表格",
+          data=csv,
+          file_name='tocfl_profile.csv',
+          )
+
+profiling.finish_run()
@@ -4,11 +4,15 @@ import pandas as pd
 import re
 import requests 
 import spacy
-from spacy_streamlit import visualize_ner, visualize_tokens
 #from spacy.language import Language
 from spacy.tokens import Doc
-import spacy_ke
 import streamlit as st
+from utils import jmdict, profiling
+from utils.analysis import DocAnalysis
+from utils.keywords import MAX_KEYWORDS, extract_keywords
+from utils.pipeline import get_doc
+from utils.render import render_sentences
+from utils.window import visualize_ner_window, visualize_tokens_window
 
 # Global variables
 DEFAULT_TEXT = """それまで、ぼくはずっとひとりぼっちだった。だれともうちとけられないまま、６年まえ、ちょっとおかしくなって、サハラさばくに下りた。ぼくのエンジンのなかで、なにかがこわれていた。ぼくには、みてくれるひとも、おきゃくさんもいなかったから、なおすのはむずかしいけど、ぜんぶひとりでなんとかやってみることにした。それでぼくのいのちがきまってしまう。のみ水は、たった７日ぶんしかなかった。
@@ -21,44 +25,53 @@ DESCRIPTION = "AI模型輔助語言學習：日語"
 TOK_SEP = " | "
 MODEL_NAME = "ja_ginza"
 
-# External API callers
+# Dictionary lookups
+def show_senses(data):
+    commons = [d for d in data if d["is_common"]]
+    if commons:
+        common = commons[0] # Only get the first entry that is common
+        senses = common["senses"]
+        if len(senses) > 3:
+            senses = senses[:3]
+        with st.container():
+            for idx, sense in enumerate(senses):
+                eng_def = "; ".join(sense["english_definitions"])
+                pos = "/".join(sense["parts_of_speech"])
+                st.write(f"Sense {idx+1}: {eng_def} ({pos})")
+    else:
+        st.info("Found no common words on Jisho!")
+
+
+def show_sentences(data):
+    if len(data) > 3:
+        sents = data[:3]
+    else:
+        sents = data
+    with st.container():
+        for idx, sent in enumerate(sents):
+            eng = sent["en_translation"]
+            jap = sent["japanese"]
+            st.write(f"Sentence {idx+1}: {jap}")
+            st.write(f"({eng})")
+
+
+# External API callers, only used for words missing from the local index
 def parse_jisho_senses(word):
-    res = Word.request(word)
+    with profiling.span("api/jisho"):
+        res = Word.request(word)
     response = res.dict()
     if response["meta"]["status"] == 200:
-        data = response["data"]
-        commons = [d for d in data if d["is_common"]]
-        if commons:
-            common = commons[0] # Only get the first entry that is common
-            senses = common["senses"]
-            if len(senses) > 3:
-                senses = senses[:3]
-            with st.container():
-                for idx, sense in enumerate(senses):
-                    eng_def = "; ".join(sense["english_definitions"])
-                    pos = "/".join(sense["parts_of_speech"])
-                    st.write(f"Sense {idx+1}: {eng_def} ({pos})")
-        else:
-            st.info("Found no common words on Jisho!")
+        show_senses(response["data"])
     else:
         st.error("Can't get response from Jisho!")
 
 
 def parse_jisho_sentences(word):
-    res = Sentence.request(word)
+    with profiling.span("api/jisho"):
+        res = Sentence.request(word)
     try:
         response = res.dict()
-        data = response["data"]
-        if len(data) > 3:
-            sents = data[:3]
-        else:
-            sents = data
-        with st.container():
-            for idx, sent in enumerate(sents):
-                eng = sent["en_translation"]
-                jap = sent["japanese"]
-                st.write(f"Sentence {idx+1}: {jap}")
-                st.write(f"({eng})")
+        show_sentences(response["data"])
     except:
         st.info("Found no results on Jisho!")
     
@@ -87,19 +100,21 @@ def create_jap_df(tokens):
       file_name='jap_forms.csv',
       )
           
-def filter_tokens(doc):
-    clean_tokens = [tok for tok in doc if tok.pos_ not in ["PUNCT", "SYM"]]
-    clean_tokens = [tok for tok in clean_tokens if not tok.like_email]
-    clean_tokens = [tok for tok in clean_tokens if not tok.like_url]
-    clean_tokens = [tok for tok in clean_tokens if not tok.like_num]
-    clean_tokens = [tok for tok in clean_tokens if not tok.is_punct]
-    clean_tokens = [tok for tok in clean_tokens if not tok.is_space]
-    return clean_tokens
-
-def create_kw_section(doc):
+def format_sentence(idx, sent):
+    clean_tokens = [tok for tok in sent if tok.pos_ not in ["PUNCT", "SYM"]]
+    tokens_text = [tok.text for tok in clean_tokens]
+    readings = ["/".join(tok.morph.get("Reading")) for tok in clean_tokens]
+    display = [f"{text} [{reading}]" for text, reading in zip(tokens_text, readings)]
+    if display:
+      display_text = TOK_SEP.join(display)
+      return f"{idx+1} >>> {display_text}"
+    else:
+      return f"{idx+1} >>> EMPTY LINE"
+
+def create_kw_section(nlp, doc):
     st.markdown("## 關鍵詞分析") 
-    kw_num = st.slider("請選擇關鍵詞數量", 1, 10, 3)
-    kws2scores = {keyword: score for keyword, score in doc._.extract_keywords(n=kw_num)}
+    kw_num = st.slider("請選擇關鍵詞數量", 1, MAX_KEYWORDS, 3)
+    kws2scores = {keyword: score for keyword, score in extract_keywords(nlp, doc, n=kw_num)}
     kws2scores = sorted(kws2scores.items(), key=lambda x: x[1], reverse=True)
     count = 1
     for keyword, score in kws2scores: 
@@ -107,26 +122,31 @@ def create_kw_section(doc):
         st.write(f"{count} >>> {keyword} ({rounded_score})")
         count += 1 
             
+@st.cache_resource
+def load_model():
+    nlp = spacy.load(MODEL_NAME)
+    # Add pipelines to spaCy
+    # nlp.add_pipe("merge_entities") # Merge entity spans to tokens
+    return nlp
+
+
 # Page setting
 st.set_page_config(
     page_icon="🤠",
     layout="wide",
     initial_sidebar_state="auto",
 )
+profiling.start_run("Japanese")
 st.markdown(f"# {DESCRIPTION}") 
 
 # Load the model
-nlp = spacy.load(MODEL_NAME)
-
-# Add pipelines to spaCy
-nlp.add_pipe("yake") # keyword extraction
-# nlp.add_pipe("merge_entities") # Merge entity spans to tokens
+with profiling.span("model_load"):
+    nlp = load_model()
 
 # Page starts from here
 st.markdown("## 待分析文本")     
 st.info("請在下面的文字框輸入文本並按下Ctrl + Enter以更新分析結果")
 text = st.text_area("",  DEFAULT_TEXT, height=200)
-doc = nlp(text)
 st.markdown("---")
 
 st.info("請勾選以下至少一項功能")
@@ -137,47 +157,64 @@ morphology = st.checkbox("詞形變化", False)
 ner_viz = st.checkbox("命名實體", True)
 tok_table = st.checkbox("斷詞特徵", False)
 
+features = [name for name, enabled in [
+    ("keywords_extraction", keywords_extraction),
+    ("analyzed_text", analyzed_text),
+    ("defs_examples", defs_examples),
+    ("morphology", morphology),
+    ("ner_viz", ner_viz),
+    ("tok_table", tok_table),
+] if enabled]
+with profiling.span("get_doc"):
+    doc = get_doc(nlp, text, features, key=MODEL_NAME)
+analysis = DocAnalysis(doc)
+
 if keywords_extraction:
-    create_kw_section(doc)
+    with profiling.span("section/keywords_extraction"):
+        create_kw_section(nlp, doc)
 
 if analyzed_text:
-    st.markdown("## 分析後文本") 
-    for idx, sent in enumerate(doc.sents):
-        clean_tokens = [tok for tok in sent if tok.pos_ not in ["PUNCT", "SYM"]]
-        tokens_text = [tok.text for tok in clean_tokens]
-        readings = ["/".join(tok.morph.get("Reading")) for tok in clean_tokens]
-        display = [f"{text} [{reading}]" for text, reading in zip(tokens_text, readings)]
-        if display:
-          display_text = TOK_SEP.join(display)
-          st.write(f"{idx+1} >>> {display_text}")
-        else:
-          st.write(f"{idx+1} >>> EMPTY LINE")  
+    with profiling.span("section/analyzed_text"):
+        st.markdown("## 分析後文本") 
+        render_sentences(doc, format_sentence, key="analyzed_text")
 
 if defs_examples:
-    st.markdown("## 單詞解釋與例句")
-    clean_tokens = filter_tokens(doc)
-    alphanum_pattern = re.compile(r"[a-zA-Z0-9]")
-    clean_lemmas = [tok.lemma_ for tok in clean_tokens if not alphanum_pattern.search(tok.lemma_)]
-    vocab = list(set(clean_lemmas))
-    if vocab:
-        selected_words = st.multiselect("請選擇要查詢的單詞: ", vocab, vocab[0:3])
-        for w in selected_words:
-            st.write(f"### {w}")
-            with st.expander("點擊 + 檢視結果"):
-                parse_jisho_senses(w)
-                parse_jisho_sentences(w)
+    with profiling.span("section/defs_examples"):
+        st.markdown("## 單詞解釋與例句")
+        clean_tokens = analysis.tokens
+        alphanum_pattern = re.compile(r"[a-zA-Z0-9]")
+        clean_lemmas = [tok.lemma_ for tok in clean_tokens if not alphanum_pattern.search(tok.lemma_)]
+        vocab = list(set(clean_lemmas))
+        if vocab:
+            selected_words = st.multiselect("請選擇要查詢的單詞: ", vocab, vocab[0:3])
+            local_senses, local_sentences = jmdict.lookup_many(selected_words)
+            for w in selected_words:
+                st.write(f"### {w}")
+                with st.expander("點擊 + 檢視結果"):
+                    if w in local_senses:
+                        show_senses(local_senses[w])
+                    else:
+                        parse_jisho_senses(w)
+                    if w in local_sentences:
+                        show_sentences(local_sentences[w])
+                    else:
+                        parse_jisho_sentences(w)
 
 if morphology:
-    st.markdown("## 詞形變化")
-    # Collect inflected forms
-    inflected_forms = [tok for tok in doc if tok.tag_.startswith("動詞") or tok.tag_.startswith("形")]
-    if inflected_forms:
-        create_jap_df(inflected_forms)
+    with profiling.span("section/morphology"):
+        st.markdown("## 詞形變化")
+        # Collect inflected forms
+        inflected_forms = [tok for tok in doc if tok.tag_.startswith("動詞") or tok.tag_.startswith("形")]
+        if inflected_forms:
+            create_jap_df(inflected_forms)
 
 if ner_viz:
-    ner_labels = nlp.get_pipe("ner").labels
-    visualize_ner(doc, labels=ner_labels, show_table=False, title="命名實體")
+    with profiling.span("section/ner_viz"):
+        ner_labels = nlp.get_pipe("ner").labels
+        visualize_ner_window(doc, labels=ner_labels, title="命名實體")
 
 if tok_table:
-    visualize_tokens(doc, attrs=["text", "pos_", "tag_", "dep_", "head"], title="斷詞特徵")
-       
+    with profiling.span("section/tok_table"):
+        visualize_tokens_window(doc, title="斷詞特徵")
+
+profiling.finish_run()
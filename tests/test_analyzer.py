@@ -0,0 +1,33 @@
+import multiprocessing
+
+import pytest
+
+import jieba
+from jieba.analyse import analyzer
+
+NEW_WORD = "撒哈拉飛行員"
+
+
+@pytest.fixture
+def spawn_start_method():
+    method = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method("spawn", force=True)
+    yield
+    multiprocessing.set_start_method(method, force=True)
+
+
+@pytest.fixture
+def new_word():
+    jieba.setLogLevel(60)
+    jieba.add_word(NEW_WORD, freq=100000)
+    yield NEW_WORD
+    jieba.del_word(NEW_WORD)
+
+
+def test_prime_cache_under_spawn(spawn_start_method, new_word, monkeypatch):
+    monkeypatch.setattr(analyzer, "token_cache", analyzer.TokenCache())
+    text = f"我是{new_word}。"
+    analyzer.prime_cache([text], processnum=2)
+    tokens = analyzer.token_cache.get(analyzer.TokenCache.key(text))
+    assert tokens == analyzer.tokenize_text(text)
+    assert any(word == new_word for word, _, _ in tokens)
@@ -0,0 +1,29 @@
+import multiprocessing
+
+import pytest
+
+import jieba
+import jieba.analyse
+
+TEXTS = [
+    "我如此的過著孤單的生活，我沒有一個可以真正跟他談話的人。",
+    "一直到六年前，我在撒哈拉沙漠飛機故障的時候。",
+    "我的發動機裡有些東西壞了。而由於我身邊沒有機械師，也沒有乘客。",
+    "頭一天晚上我在離開有人居住的地方一千英里的沙地上睡覺。",
+]
+
+
+@pytest.fixture
+def spawn_start_method():
+    method = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method("spawn", force=True)
+    yield
+    multiprocessing.set_start_method(method, force=True)
+
+
+@pytest.mark.parametrize("extractor", [jieba.analyse.TFIDF, jieba.analyse.TextRank])
+def test_parallel_extraction_under_spawn(spawn_start_method, extractor):
+    jieba.setLogLevel(60)
+    extractor = extractor()
+    expected = list(extractor.extract_tags_many(TEXTS, topK=5, withWeight=True))
+    assert list(extractor.extract_tags_many(TEXTS, topK=5, withWeight=True, n_jobs=2, chunksize=1)) == expected
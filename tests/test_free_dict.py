@@ -0,0 +1,42 @@
+import requests
+
+from utils import free_dict
+
+ENTRY = {"word": "go", "meanings": []}
+
+
+class FakeResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def test_failed_lookups_expire(monkeypatch):
+    responses = [requests.Timeout(), FakeResponse(503, {}), FakeResponse(200, [ENTRY])]
+    clock = [0.0]
+
+    def fake_get(url, timeout):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(free_dict.requests, "get", fake_get)
+    monkeypatch.setattr(free_dict.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(free_dict, "_CACHE", {})
+    monkeypatch.setattr(free_dict, "_FAILURES", {})
+
+    assert free_dict.lookup("Go") is None
+    # the failure is remembered for a while, not requested again
+    assert free_dict.lookup("go") is None
+    assert len(responses) == 2
+    clock[0] += free_dict.FAILURE_TTL
+    assert free_dict.prefetch(["go"]) == {"go": None}
+    clock[0] += free_dict.FAILURE_TTL
+    assert free_dict.lookup("go") == ENTRY
+    clock[0] += free_dict.FAILURE_TTL
+    assert free_dict.lookup("go") == ENTRY
+    assert not responses
@@ -0,0 +1,40 @@
+import multiprocessing
+import os
+
+import pytest
+
+import jieba
+from jieba.analyse.idf_builder import DocumentFrequencies
+
+TEXTS = [
+    "我在撒哈拉沙漠飛機故障的時候遇見了小王子。",
+    "小王子請我給他畫一隻綿羊。",
+]
+NEW_WORD = "撒哈拉飛行員"
+
+
+@pytest.fixture
+def spawn_start_method():
+    method = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method("spawn", force=True)
+    yield
+    multiprocessing.set_start_method(method, force=True)
+
+
+@pytest.fixture
+def new_word():
+    jieba.setLogLevel(60)
+    jieba.add_word(NEW_WORD, freq=100000)
+    yield NEW_WORD
+    jieba.del_word(NEW_WORD)
+
+
+def test_document_frequencies_under_spawn(spawn_start_method, new_word, tmp_path):
+    texts = TEXTS + [f"我是{new_word}。"]
+    serial = DocumentFrequencies(os.fspath(tmp_path / "serial"))
+    serial.update(texts)
+    parallel = DocumentFrequencies(os.fspath(tmp_path / "parallel"))
+    parallel.update(texts, processnum=2, chunksize=1)
+    assert parallel.df == serial.df
+    assert new_word in parallel.df
+
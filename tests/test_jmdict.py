@@ -0,0 +1,17 @@
+import os
+
+from utils import jmdict
+from utils.mmap_index import write_index
+
+
+def test_missing_index_is_opened_once_built(monkeypatch, tmp_path):
+    monkeypatch.setattr(jmdict, "_INDEXES", {})
+    index_path = os.fspath(tmp_path / "jmdict.idx")
+    examples_path = os.fspath(tmp_path / "jmdict_examples.idx")
+    assert jmdict.load_indexes(index_path, examples_path) == (None, None)
+
+    write_index(index_path, [("猫", [{"is_common": True}])])
+    senses_index, examples_index = jmdict.load_indexes(index_path, examples_path)
+    assert senses_index.get("猫") == [{"is_common": True}]
+    assert examples_index is None
+    assert jmdict.load_indexes(index_path, examples_path)[0] is senses_index
@@ -0,0 +1,20 @@
+import io
+import os
+
+from utils import pinyin_table
+from utils.mmap_index import MmapIndex
+
+WORDS = ["中華民國", "銀行", "銀行家們", "中華民國國旗", "卡拉OK", "A咖"]
+
+
+def test_readings_have_the_same_case_in_and_out_of_cedict(tmp_path):
+    known_words = pinyin_table.load_cedict_words()
+    assert "中華民國" in known_words and "中華民國國旗" not in known_words
+    path = os.fspath(tmp_path / "pinyin.idx")
+    dict_file = io.BytesIO("".join(f"{word} 3 n\n" for word in WORDS).encode("utf-8"))
+    pinyin_table.build_table(path, dict_file)
+    table = MmapIndex(path)
+    assert table.get("中華民國") == "zhōnghuámínguó"
+    assert table.get("中華民國國旗").startswith("zhōnghuámínguó")
+    assert table.get("銀行") == "yínháng"
+    assert table.get("A咖").startswith("A")
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+import spacy
+from spacy.language import Language
+
+from utils import pipeline
+
+GINZA_PIPES = ["tok2vec", "parser", "attribute_ruler", "ner", "morphologizer", "compound_splitter", "bunsetu_recognizer"]
+CALLS = []
+
+
+class CallRecorder:
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, doc):
+        CALLS.append(self.name)
+        return doc
+
+
+@Language.factory("call_recorder")
+def make_call_recorder(nlp, name):
+    return CallRecorder(name)
+
+
+@pytest.fixture
+def ginza_nlp(monkeypatch):
+    monkeypatch.setattr(pipeline, "st", SimpleNamespace(session_state={}))
+    nlp = spacy.blank("xx")
+    for name in GINZA_PIPES:
+        nlp.add_pipe("call_recorder", name=name)
+    CALLS.clear()
+    return nlp
+
+
+def test_required_pipes_skip_unneeded_ginza_components(ginza_nlp):
+    assert pipeline.required_pipes(ginza_nlp, []) == []
+    assert pipeline.required_pipes(ginza_nlp, ["freq_count"]) == ["attribute_ruler", "morphologizer"]
+
+
+def test_bunsetu_recognizer_runs_after_parser(ginza_nlp):
+    needed = pipeline.required_pipes(ginza_nlp, ["tok_table"])
+    assert "bunsetu_recognizer" not in needed
+    assert pipeline._rerun_pipes(ginza_nlp, {"parser"}, {"parser", "morphologizer", "bunsetu_recognizer"}) == {
+        "parser", "bunsetu_recognizer"}
+
+
+def test_get_doc_runs_only_missing_components(ginza_nlp):
+    pipeline.get_doc(ginza_nlp, "テキスト", ["freq_count"])
+    assert CALLS == ["attribute_ruler", "morphologizer"]
+    CALLS.clear()
+    pipeline.get_doc(ginza_nlp, "テキスト", ["freq_count", "tok_table"])
+    assert CALLS == ["parser"]
+    CALLS.clear()
+    pipeline.get_doc(ginza_nlp, "テキスト", ["freq_count", "tok_table", "ner_viz"])
+    assert CALLS == ["ner"]
+
+
+def test_keywords_extraction_runs_lemmatizer(monkeypatch):
+    monkeypatch.setattr(pipeline, "st", SimpleNamespace(session_state={}))
+    nlp = spacy.blank("xx")
+    for name in ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]:
+        nlp.add_pipe("call_recorder", name=name)
+    assert "lemmatizer" in pipeline.required_pipes(nlp, ["keywords_extraction"])
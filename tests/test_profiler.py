@@ -0,0 +1,36 @@
+import multiprocessing
+
+import pytest
+
+import jieba
+from utils import profiler
+
+DOCS = [
+    ("a", "我如此的過著孤單的生活，我沒有一個可以真正跟他談話的人。"),
+    ("b", "一直到六年前，我在撒哈拉沙漠飛機故障的時候。"),
+    ("c", "我的發動機裡有些東西壞了。"),
+]
+# A word only the parent process knows, which changes the token counts
+NEW_WORD = "孤單的生活"
+
+
+@pytest.fixture
+def spawn_start_method():
+    method = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method("spawn", force=True)
+    yield
+    multiprocessing.set_start_method(method, force=True)
+
+
+@pytest.fixture
+def new_word():
+    jieba.setLogLevel(60)
+    jieba.add_word(NEW_WORD, freq=100000)
+    yield NEW_WORD
+    jieba.del_word(NEW_WORD)
+
+
+def test_profile_documents_under_spawn(spawn_start_method, new_word):
+    serial = profiler.profile_table(DOCS)
+    parallel = profiler.profile_table(DOCS, n_jobs=2)
+    assert parallel.equals(serial)
@@ -0,0 +1,38 @@
+import spacy
+
+from utils import render
+
+
+class FakeStreamlit:
+    def __init__(self):
+        self.session_state = {}
+        self.blocks = []
+
+    def markdown(self, text):
+        self.blocks.append(text)
+
+    def button(self, label, key, on_click, args):
+        pass
+
+
+def make_doc(text, num_sents):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    return nlp(" ".join(f"{text} {i}." for i in range(num_sents)))
+
+
+def test_limit_resets_when_text_changes(monkeypatch):
+    fake_st = FakeStreamlit()
+    monkeypatch.setattr(render, "st", fake_st)
+    format_sentence = lambda idx, sent: sent.text
+
+    render.render_sentences(make_doc("Old", 5), format_sentence, key="text", page_size=2)
+    render._load_more("text_limit", 2)
+    fake_st.blocks.clear()
+    render.render_sentences(make_doc("Old", 5), format_sentence, key="text", page_size=2)
+    assert len(fake_st.blocks) == 2
+
+    fake_st.blocks.clear()
+    render.render_sentences(make_doc("New", 5), format_sentence, key="text", page_size=2)
+    assert fake_st.blocks == ["New 0.  \nNew 1."]
+    assert fake_st.session_state["text_limit"] == 2
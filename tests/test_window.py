@@ -0,0 +1,46 @@
+import spacy
+from spacy.tokens import Span
+
+from utils import window
+
+
+class FakeStreamlit:
+    def __init__(self, selection):
+        self.selection = selection
+        self.captions = []
+
+    def slider(self, label, min_value, max_value, value, key):
+        return self.selection
+
+    def caption(self, text):
+        self.captions.append(text)
+
+
+def make_doc(num_sents):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    doc = nlp(" ".join(f"Anna met Bob Smith in New York {i}." for i in range(num_sents)))
+    doc.ents = [Span(doc, start, start + length, label)
+                for i in range(num_sents)
+                for start, length, label in [(i * 9, 1, "PER"), (i * 9 + 2, 2, "PER"), (i * 9 + 5, 2, "LOC")]]
+    return doc
+
+
+def test_window_ents_match_the_span(monkeypatch):
+    doc = make_doc(50)
+    span = doc[9 * 10:9 * 12]
+    [data] = window.get_window_ents(span)
+    assert data["text"] == span.text
+    assert [(data["text"][e["start"]:e["end"]], e["label"]) for e in data["ents"]] == [
+        (ent.text, ent.label_) for ent in span.ents]
+
+
+def test_window_is_clamped(monkeypatch):
+    doc = make_doc(50)
+    fake_st = FakeStreamlit((3, 50))
+    monkeypatch.setattr(window, "st", fake_st)
+    span = window.sentence_window(doc, key="ner", window_size=20)
+    sents = list(span.sents)
+    assert len(sents) == 20
+    assert sents[0].start == list(doc.sents)[2].start
+    assert fake_st.captions
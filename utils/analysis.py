@@ -0,0 +1,119 @@
+"""Single-pass token filtering shared by all pages.
+
+`DocAnalysis` reads the filtering attributes of a doc with one
+`Doc.to_array` call and turns them into a boolean mask of the content
+tokens, i.e. tokens that aren't punctuation, symbols, spaces, numbers,
+emails or URLs. The token list, vocabulary, counter and lemma/POS set are
+derived from that mask on first access and then reused by every section.
+
+Word frequencies are counted over the ORTH ids of the masked tokens with
+`np.unique`, and the top K words are picked with `np.argpartition`, so
+only the K selected ids are ever converted back to strings.
+"""
+from collections import Counter
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from spacy.attrs import IS_PUNCT, IS_SPACE, LIKE_EMAIL, LIKE_NUM, LIKE_URL, ORTH, POS
+from spacy.symbols import PUNCT, SYM
+
+FILTER_ATTRS = [ORTH, POS, LIKE_EMAIL, LIKE_URL, LIKE_NUM, IS_PUNCT, IS_SPACE]
+EXCLUDED_POS = [PUNCT, SYM]
+
+
+class DocAnalysis:
+
+    def __init__(self, doc):
+        self.doc = doc
+        array = doc.to_array(FILTER_ATTRS).reshape(len(doc), len(FILTER_ATTRS))
+        excluded = np.isin(array[:, 1], EXCLUDED_POS) | array[:, 2:].any(axis=1)
+        self.mask = ~excluded
+        self.orths = array[:, 0]
+        self.indices = np.flatnonzero(self.mask)
+
+    def __repr__(self):
+        return f"<DocAnalysis tokens={len(self.indices)}/{len(self.doc)}>"
+
+    @cached_property
+    def tokens(self):
+        doc = self.doc
+        return [doc[i] for i in self.indices.tolist()]
+
+    @cached_property
+    def texts(self):
+        return [tok.text for tok in self.tokens]
+
+    @cached_property
+    def vocab(self):
+        return set(self.texts)
+
+    @cached_property
+    def counter(self):
+        return Counter(self.texts)
+
+    @cached_property
+    def lemma_pos(self):
+        return {(tok.lemma_, tok.pos_) for tok in self.tokens}
+
+    @cached_property
+    def frequencies(self):
+        return Frequencies(self.doc.vocab.strings, self.orths[self.mask])
+
+
+class Frequencies:
+    """Counts of an array of string ids, e.g. the ORTH column of `Doc.to_array`.
+
+    Ties are broken by first occurrence, as in `Counter.most_common`.
+    """
+
+    def __init__(self, strings, ids):
+        self.strings = strings
+        self.ids, self.first, self.counts = np.unique(ids, return_index=True, return_counts=True)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def top_indices(self, k=None):
+        """Return the indices of the `k` most frequent ids, most frequent first."""
+        counts, first = self.counts, self.first
+        n = len(counts)
+        if k is None or k >= n:
+            idx = np.arange(n)
+        elif k <= 0:
+            idx = np.arange(0)
+        else:
+            kth = counts[np.argpartition(counts, n - k)[n - k]]
+            above = np.flatnonzero(counts > kth)
+            ties = np.flatnonzero(counts == kth)
+            ties = ties[np.argsort(first[ties], kind="stable")][:k - len(above)]
+            idx = np.concatenate([above, ties])
+        return idx[np.lexsort((first[idx], -counts[idx]))]
+
+    def most_common(self, k=None):
+        idx = self.top_indices(k)
+        strings = self.strings
+        return [(strings[int(i)], int(c)) for i, c in zip(self.ids[idx], self.counts[idx])]
+
+    def to_frame(self, k=None):
+        return pd.DataFrame(self.most_common(k), columns=["word", "count"])
+
+    def page(self, start, stop):
+        """Return ranks `start` to `stop` (exclusive) as a DataFrame."""
+        idx = self.top_indices(stop)[start:stop]
+        strings = self.strings
+        return pd.DataFrame(
+            {
+                "word": [strings[int(i)] for i in self.ids[idx]],
+                "count": self.counts[idx],
+            },
+            index=range(start + 1, start + 1 + len(idx)),
+        )
+
+
+def word_frequencies(doc, mask=None):
+    """Return the `Frequencies` of the token texts of `doc`, optionally masked."""
+    ids = doc.to_array(ORTH)
+    if mask is not None:
+        ids = ids[mask]
+    return Frequencies(doc.vocab.strings, ids)
@@ -0,0 +1,42 @@
+"""Frequency charts whose size doesn't grow with the length of the text.
+
+Only the top N words are plotted, the rest are summed into a single
+"其他" bar, and the long tail is browsed page by page in a table. The
+Plotly payload sent to the browser is therefore bounded by N.
+"""
+import math
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+MAX_BARS = 50
+OTHER_LABEL = "其他"
+PAGE_SIZE = 100
+
+
+def get_freq_fig(frequencies, top_n=MAX_BARS, show_other=True, webgl=False):
+    counter_df = frequencies.to_frame(top_n)
+    if show_other:
+        rest = int(frequencies.counts.sum()) - int(counter_df["count"].sum())
+        if rest > 0:
+            other = pd.DataFrame({"word": [OTHER_LABEL], "count": [rest]})
+            counter_df = pd.concat([counter_df, other], ignore_index=True)
+    if webgl:
+        fig = go.Figure(go.Scattergl(x=counter_df["word"], y=counter_df["count"], mode="markers"))
+        fig.update_layout(xaxis_title="word", yaxis_title="count")
+    else:
+        fig = px.bar(counter_df, x="word", y="count")
+    return fig
+
+
+def show_long_tail(frequencies, start, page_size=PAGE_SIZE, key="long_tail_page"):
+    """Show the words ranked after `start` as a paginated table."""
+    num_words = len(frequencies) - start
+    if num_words <= 0:
+        return
+    num_pages = math.ceil(num_words / page_size)
+    page = st.number_input(f"頁數 (共 {num_pages} 頁)", 1, num_pages, 1, key=key)
+    page_start = start + (page - 1) * page_size
+    st.table(frequencies.page(page_start, min(page_start + page_size, len(frequencies))))
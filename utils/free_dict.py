@@ -0,0 +1,111 @@
+"""Cached, batched lookups against the Free Dictionary API.
+
+Entries are keyed by lemma so that inflected forms (e.g. "went", "gone")
+share a single request. The cache lives at module level, which means it
+survives Streamlit reruns and is shared by all sessions of the app. Only
+entries are kept for good: a word without an entry (a timeout, a network
+error or any non-200 response) is only remembered for FAILURE_TTL seconds,
+so that a passing outage doesn't hide its definitions until a restart.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import threading
+import time
+
+import requests
+
+from utils.profiling import span
+
+API_URL = "https://api.dictionaryapi.dev/api/v2/entries/en/{word}"
+MAX_WORKERS = 8
+TIMEOUT = 10
+FAILURE_TTL = 60
+
+_CACHE = {}
+# word -> time.monotonic() until which it is not requested again
+_FAILURES = {}
+_LOCK = threading.Lock()
+
+
+def free_dict_caller(word):
+    """Fetch the first entry for `word`, or None if there is no result."""
+    try:
+        with span("api/free_dict"):
+            req = requests.get(API_URL.format(word=word), timeout=TIMEOUT)
+        if req.status_code != 200:
+            return None
+        return req.json()[0]
+    except Exception:
+        return None
+
+
+def _is_cached(word):
+    """Whether `word` has an entry or a recent failure; call with _LOCK held."""
+    if word in _CACHE:
+        return True
+    expiry = _FAILURES.get(word)
+    if expiry is None:
+        return False
+    if expiry <= time.monotonic():
+        del _FAILURES[word]
+        return False
+    return True
+
+
+def lookup(word):
+    word = word.lower()
+    with _LOCK:
+        if _is_cached(word):
+            return _CACHE.get(word)
+    result = free_dict_caller(word)
+    with _LOCK:
+        if result is None:
+            _FAILURES[word] = time.monotonic() + FAILURE_TTL
+        else:
+            _CACHE[word] = result
+            _FAILURES.pop(word, None)
+    return result
+
+
+def prefetch(words, max_workers=MAX_WORKERS):
+    """Resolve all uncached `words` concurrently and return their entries."""
+    words = {word.lower() for word in words}
+    with _LOCK:
+        missing = [word for word in words if not _is_cached(word)]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+            # in copies of the caller's context, so that profiling spans count towards its rerun
+            futures = [executor.submit(contextvars.copy_context().run, lookup, word) for word in missing]
+            for future in futures:
+                future.result()
+    with _LOCK:
+        return {word: _CACHE.get(word) for word in words}
+
+
+def _matching_meanings(word, pos):
+    result = lookup(word)
+    if not result:
+        return None
+    meanings = result.get('meanings') or []
+    return [meaning for meaning in meanings if meaning['partOfSpeech'] == pos.lower()]
+
+
+def get_synonyms(word, pos):
+    meanings = _matching_meanings(word, pos)
+    if meanings is None:
+        return None
+    synonyms = []
+    for meaning in meanings:
+        synonyms = meaning.get('synonyms')
+    return synonyms
+
+
+def get_definitions(word, pos):
+    """Return a list of (definition, example) pairs, or None if not found."""
+    meanings = _matching_meanings(word, pos)
+    if meanings is None:
+        return None
+    definitions = []
+    for meaning in meanings:
+        definitions = meaning.get('definitions')
+    return [(definition.get("definition"), definition.get("example")) for definition in definitions]
@@ -0,0 +1,154 @@
+"""Offline Japanese dictionary lookups built from a JMdict dump.
+
+Build the indexes once with
+
+    python -m utils.jmdict JMdict_e.gz --examples examples.utf.gz
+
+which writes `data/jmdict.idx` (word -> senses, parts of speech and the
+common flag) and `data/jmdict_examples.idx` (word -> example sentences from
+the Tanaka corpus shipped alongside JMdict). Both are memory-mapped at
+runtime with `utils.mmap_index`. Entries use the same field names as the
+Jisho API responses, so the page can render local and remote results the
+same way.
+"""
+from argparse import ArgumentParser
+import gzip
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+
+from utils.mmap_index import MmapIndex, write_index
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_INDEX = os.path.join(DATA_DIR, "jmdict.idx")
+DEFAULT_EXAMPLES_INDEX = os.path.join(DATA_DIR, "jmdict_examples.idx")
+MAX_SENSES = 5
+MAX_SENTENCES = 3
+
+# Priority codes that Jisho treats as "common"
+COMMON_PRI = frozenset(("news1", "ichi1", "spec1", "spec2", "gai1"))
+
+# B-line markup of the Tanaka corpus: 彼(かれ)[01]{彼の}~
+re_tanaka_word = re.compile(r"^([^(\[{~]+)")
+
+# path -> MmapIndex of the indexes opened so far
+_INDEXES = {}
+_LOCK = threading.Lock()
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def parse_jmdict(path):
+    """Yield (word, entry) pairs for every kanji and kana form in a JMdict XML file."""
+    with _open(path) as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag != "entry":
+                continue
+            kebs = [k.findtext("keb") for k in elem.iter("k_ele")]
+            rebs = [r.findtext("reb") for r in elem.iter("r_ele")]
+            pris = {p.text for p in elem.iter("ke_pri")} | {p.text for p in elem.iter("re_pri")}
+            senses = []
+            pos = []
+            for sense in elem.iter("sense"):
+                # A sense without <pos> inherits the parts of speech of the previous one
+                pos = [p.text for p in sense.iter("pos")] or pos
+                senses.append({
+                    "english_definitions": [g.text for g in sense.iter("gloss") if g.text],
+                    "parts_of_speech": pos,
+                })
+                if len(senses) >= MAX_SENSES:
+                    break
+            entry = {
+                "reading": rebs[0] if rebs else "",
+                "is_common": bool(pris & COMMON_PRI),
+                "senses": senses,
+            }
+            for word in dict.fromkeys(kebs + rebs):
+                yield word, entry
+            elem.clear()
+
+
+def parse_tanaka(path):
+    """Yield (word, sentence) pairs from a Tanaka corpus `examples.utf` file."""
+    sentence = None
+    with _open(path) as f:
+        for line in f:
+            line = line.decode("utf-8").rstrip("\n")
+            if line.startswith("A: "):
+                japanese, _, english = line[3:].partition("\t")
+                english = english.split("#ID=")[0]
+                sentence = {"japanese": japanese, "en_translation": english}
+            elif line.startswith("B: ") and sentence:
+                seen = set()
+                for token in line[3:].split():
+                    match = re_tanaka_word.match(token)
+                    if match and match.group(1) not in seen:
+                        seen.add(match.group(1))
+                        yield match.group(1), sentence
+                sentence = None
+
+
+def build_index(jmdict_path, index_path=DEFAULT_INDEX):
+    entries = {}
+    for word, entry in parse_jmdict(jmdict_path):
+        entries.setdefault(word, []).append(entry)
+    return write_index(index_path, entries.items())
+
+
+def build_examples_index(examples_path, index_path=DEFAULT_EXAMPLES_INDEX):
+    sentences = {}
+    for word, sentence in parse_tanaka(examples_path):
+        word_sentences = sentences.setdefault(word, [])
+        if len(word_sentences) < MAX_SENTENCES:
+            word_sentences.append(sentence)
+    return write_index(index_path, sentences.items())
+
+
+def load_indexes(index_path=DEFAULT_INDEX, examples_index_path=DEFAULT_EXAMPLES_INDEX):
+    """Open the indexes once per process. A missing index is returned as None.
+
+    Missing indexes aren't cached, so an index built while the app is
+    running is opened on the next call.
+    """
+    with _LOCK:
+        for path in (index_path, examples_index_path):
+            if path not in _INDEXES and os.path.isfile(path):
+                _INDEXES[path] = MmapIndex(path)
+        return _INDEXES.get(index_path), _INDEXES.get(examples_index_path)
+
+
+def lookup_many(words):
+    """Resolve `words` locally in bulk.
+
+    Returns two dicts, word -> entries and word -> sentences, holding only
+    the words that were found. Callers fall back to Jisho for the rest.
+    """
+    senses_index, examples_index = load_indexes()
+    senses = senses_index.get_many(words) if senses_index else {}
+    sentences = examples_index.get_many(words) if examples_index else {}
+    return senses, sentences
+
+
+def main():
+    parser = ArgumentParser(description="Build the offline JMdict indexes.")
+    parser.add_argument("jmdict", help="path to JMdict or JMdict_e (.xml or .gz)")
+    parser.add_argument("-e", "--examples", help="path to the Tanaka corpus examples.utf (.utf or .gz)")
+    parser.add_argument("-o", "--output", default=DEFAULT_INDEX, help="output path of the word index")
+    parser.add_argument("--examples-output", default=DEFAULT_EXAMPLES_INDEX,
+                        help="output path of the example sentence index")
+    args = parser.parse_args()
+
+    count = build_index(args.jmdict, args.output)
+    print(f"Wrote {count} words to {args.output}")
+    if args.examples:
+        count = build_examples_index(args.examples, args.examples_output)
+        print(f"Wrote example sentences for {count} words to {args.examples_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Keywords computed on demand on the cached doc.
+
+YAKE isn't added to the pipeline, so parsing a text doesn't pay for
+keyword extraction when the keyword section is off. When the section is
+on, one `Yake` extractor per model scores the candidates of the already
+parsed doc. The ranking is computed once per doc for `MAX_KEYWORDS` and
+kept in a small LRU cache keyed by the model and a hash of the tokens, so
+that moving the keyword number slider only slices it: the redundancy
+filter of YAKE walks the candidates in score order, so the best `n`
+keywords are always a prefix of the best `MAX_KEYWORDS`.
+
+YAKE doesn't work for Chinese, which is ranked with the TF-IDF and
+TextRank extractors of `jieba.analyse` instead. They are given the tokens
+of the doc with their spaCy POS tags mapped to jieba flags, so the text
+isn't segmented and tagged a second time.
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+
+from spacy.attrs import ORTH
+from spacy_ke import Yake
+
+MAX_KEYWORDS = 10
+CACHE_SIZE = 64
+
+CHINESE_METHODS = ("tfidf", "textrank")
+# jieba flags of the spaCy POS tags
+UPOS_FLAGS = {
+    "NOUN": "n",
+    "PROPN": "ns",
+    "VERB": "v",
+    "ADJ": "a",
+    "ADV": "d",
+}
+KEYWORD_FLAGS = ("n", "ns", "v")
+
+_EXTRACTORS = {}
+_RANKINGS = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def get_extractor(nlp):
+    with _LOCK:
+        extractor = _EXTRACTORS.get(id(nlp))
+        if extractor is None:
+            extractor = _EXTRACTORS[id(nlp)] = Yake(nlp)
+        return extractor
+
+
+def doc_key(nlp, doc):
+    # The tokens are part of the key, since the same text may be segmented differently
+    digest = hashlib.blake2b(doc.text.encode("utf-8"), digest_size=16)
+    digest.update(doc.to_array(ORTH).tobytes())
+    return nlp.meta.get("lang"), nlp.meta.get("name"), digest.hexdigest()
+
+
+def _cached_ranking(key, rank):
+    with _LOCK:
+        ranking = _RANKINGS.get(key)
+        if ranking is not None:
+            _RANKINGS.move_to_end(key)
+            return ranking
+    ranking = rank()
+    with _LOCK:
+        _RANKINGS[key] = ranking
+        if len(_RANKINGS) > CACHE_SIZE:
+            _RANKINGS.popitem(last=False)
+    return ranking
+
+
+def extract_keywords(nlp, doc, n=3):
+    """Return the `n` best (keyword, score) pairs of `doc` by YAKE, best first."""
+    def rank():
+        extractor = get_extractor(nlp)
+        # Sets doc._.kw_candidates, which the weighting reads
+        extractor(doc)
+        return [(span.text, float(score))
+                for span, score in extractor.extract_keywords(doc, n=MAX_KEYWORDS)]
+
+    return _cached_ranking((doc_key(nlp, doc), "yake"), rank)[:n]
+
+
+def doc_pairs(doc):
+    from jieba.posseg import pair
+    return [pair(tok.text, UPOS_FLAGS.get(tok.pos_, "x")) for tok in doc]
+
+
+def extract_chinese_keywords(nlp, doc, method="tfidf", n=3):
+    """Return the `n` best (keyword, weight) pairs of `doc` by TF-IDF or TextRank."""
+    # Imported here so that the other pages don't load jieba's POS tagger
+    import jieba.analyse
+
+    def rank():
+        words = doc_pairs(doc)
+        if method == "tfidf":
+            tags = jieba.analyse.default_tfidf.extract_tags_from_words(
+                words, topK=None, withWeight=True, allowPOS=KEYWORD_FLAGS)
+        else:
+            # TextRank keeps the allowed flags on the instance, so it isn't shared
+            tags = jieba.analyse.TextRank().textrank_from_words(
+                words, topK=None, withWeight=True, allowPOS=KEYWORD_FLAGS)
+        return [(word, float(weight)) for word, weight in tags]
+
+    if method not in CHINESE_METHODS:
+        raise ValueError(f"Unknown keyword extraction method: {method}")
+    return _cached_ranking((doc_key(nlp, doc), method), rank)[:n]
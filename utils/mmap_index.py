@@ -0,0 +1,112 @@
+"""A compact, read-only, memory-mapped string -> JSON index.
+
+File layout (all integers little-endian):
+
+    magic (4 bytes) | version (uint32) | count (uint32)
+    count * (key_offset, key_length, value_offset, value_length) as uint32
+    key blob | value blob
+
+The entry table is sorted by the UTF-8 encoded key, so lookups are a binary
+search over the memory-mapped file and nothing is parsed until a key is hit.
+Opening an index is cheap and the pages are shared by every process that
+maps the same file.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b"MIDX"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+ENTRY = struct.Struct("<IIII")
+
+
+def write_index(path, items):
+    """Write an index from an iterable of (key, value) pairs.
+
+    Values must be JSON serializable. Later duplicates of a key win.
+    """
+    entries = {}
+    for key, value in items:
+        entries[key.encode("utf-8")] = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    keys = sorted(entries)
+
+    key_blob_size = sum(len(key) for key in keys)
+    key_offset = HEADER.size + ENTRY.size * len(keys)
+    value_offset = key_offset + key_blob_size
+    table = []
+    for key in keys:
+        value = entries[key]
+        table.append(ENTRY.pack(key_offset, len(key), value_offset, len(value)))
+        key_offset += len(key)
+        value_offset += len(value)
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dirname, exist_ok=True)
+    fd, fpath = tempfile.mkstemp(dir=dirname)
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys)))
+        f.writelines(table)
+        f.writelines(keys)
+        f.writelines(entries[key] for key in keys)
+    os.replace(fpath, path)
+    return len(keys)
+
+
+class MmapIndex:
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a valid index file")
+
+    def __repr__(self):
+        return f"<MmapIndex path={self.path!r} entries={self._count}>"
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, idx):
+        return ENTRY.unpack_from(self._mm, HEADER.size + ENTRY.size * idx)
+
+    def _find(self, key):
+        key = key.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_off, key_len, value_off, value_len = self._entry(mid)
+            probe = self._mm[key_off:key_off + key_len]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return value_off, value_len
+        return None
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def get(self, key, default=None):
+        found = self._find(key)
+        if found is None:
+            return default
+        value_off, value_len = found
+        return json.loads(self._mm[value_off:value_off + value_len].decode("utf-8"))
+
+    def get_many(self, keys):
+        """Return a dict with the values of all `keys` found in the index."""
+        results = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                results[key] = value
+        return results
+
+    def close(self):
+        self._mm.close()
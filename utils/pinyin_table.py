@@ -0,0 +1,121 @@
+"""Word-level pinyin table for every word in jieba's dictionary.
+
+Build it once with
+
+    python -m utils.pinyin_table
+
+which writes `data/pinyin.idx`, a `utils.mmap_index` file mapping each of
+the words jieba segments into to its accented pinyin. Words that CC-CEDICT
+knows keep their dictionary reading. Other words are split into the
+longest CC-CEDICT words they contain, so that polyphonic characters are
+read in context (行 in 銀行 vs 行走) instead of character by character.
+At runtime the table is memory-mapped and dragonmapper is only needed for
+tokens that aren't in jieba's dictionary.
+"""
+from argparse import ArgumentParser
+import os
+import threading
+
+from dragonmapper import hanzi
+import dragonmapper.data
+
+import jieba
+from utils.mmap_index import MmapIndex, write_index
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_TABLE = os.path.join(DATA_DIR, "pinyin.idx")
+
+VOWELS = frozenset("aāáǎàeēéěèoōóǒò")
+# The CC-CEDICT words that dragonmapper ships with
+CEDICT_WORDS_FILE = "hanzi_pinyin_words.tsv"
+
+_TABLE = None
+_LOCK = threading.Lock()
+
+
+def iter_dict_words(f=None):
+    f = f or jieba.get_dict_file()
+    with f:
+        for line in f:
+            word = line.strip().decode("utf-8").split(" ")[0]
+            if word:
+                yield word
+
+
+def word_reading(word):
+    """The pinyin of `word` in lowercase, as part of a table of common words.
+
+    dragonmapper capitalizes proper nouns (中華民國 -> ZhōnghuáMínguó). Words
+    with Latin letters (A咖, 卡拉OK) keep their reading, letters included.
+    """
+    reading = hanzi.to_pinyin(word)
+    if any(char.isascii() and char.isalpha() for char in word):
+        return reading
+    return reading.lower()
+
+
+def compose_reading(word, known_words, max_len):
+    """Read `word` as a sequence of the longest words in `known_words`."""
+    readings = []
+    start = 0
+    while start < len(word):
+        for end in range(min(len(word), start + max_len), start, -1):
+            if end - start == 1 or word[start:end] in known_words:
+                reading = word_reading(word[start:end])
+                # Syllables starting with a, e or o are separated by an apostrophe
+                if readings and not word[start - 1].isascii() and reading[:1] in VOWELS:
+                    reading = "'" + reading
+                readings.append(reading)
+                start = end
+                break
+    return "".join(readings)
+
+
+def load_cedict_words():
+    """Return the set of CC-CEDICT words from dragonmapper's data files."""
+    try:
+        lines = dragonmapper.data.load_data_file(CEDICT_WORDS_FILE)
+    except (AttributeError, OSError) as e:
+        raise RuntimeError(
+            f"Can't read {CEDICT_WORDS_FILE} from dragonmapper, which is needed to read words in context: {e}"
+        ) from e
+    words = {line.split("\t", 1)[0] for line in lines if line.strip()}
+    if not words:
+        raise RuntimeError(f"dragonmapper's {CEDICT_WORDS_FILE} has no words")
+    return words
+
+
+def build_table(table_path=DEFAULT_TABLE, dict_file=None):
+    known_words = load_cedict_words()
+    max_len = max(map(len, known_words))
+    items = []
+    for word in iter_dict_words(dict_file):
+        if len(word) == 1 or word in known_words:
+            items.append((word, word_reading(word)))
+        else:
+            items.append((word, compose_reading(word, known_words, max_len)))
+    return write_index(table_path, items)
+
+
+def load_table(table_path=DEFAULT_TABLE):
+    """Open the table once per process, or return None if it hasn't been built."""
+    global _TABLE
+    with _LOCK:
+        if _TABLE is None and os.path.isfile(table_path):
+            _TABLE = MmapIndex(table_path)
+    return _TABLE
+
+
+def main():
+    parser = ArgumentParser(description="Build the word-level pinyin table from jieba's dictionary.")
+    parser.add_argument("-D", "--dict", help="use DICT instead of jieba's default dictionary")
+    parser.add_argument("-o", "--output", default=DEFAULT_TABLE, help="output path of the table")
+    args = parser.parse_args()
+
+    dict_file = open(args.dict, "rb") if args.dict else None
+    count = build_table(args.output, dict_file)
+    print(f"Wrote pinyin of {count} words to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Run only the pipeline components that the enabled page sections need.
+
+Each section declares which doc attributes it reads (sentences, POS,
+lemmas, entities...). Those are mapped to the components that set them,
+plus whatever these components depend on: the shared tok2vec/transformer
+they listen to, or the POS tags a rule-based lemmatizer needs. Components
+that no enabled section needs don't run, including ginza's compound
+splitter and bunsetu recognizer, which read the dependency arcs.
+
+The parsed doc is cached in the session together with the components
+already applied to it. When a section is enabled later, only the
+missing components are run on the cached doc, together with the applied
+components after them that read or overwrite what they set. Components are called one by one on the
+doc rather than through `nlp.select_pipes`, because the model is shared
+by all sessions and `select_pipes` would disable pipes for everyone.
+"""
+import streamlit as st
+
+from utils.profiling import span
+
+# Doc attributes read by each page section
+FEATURE_ATTRS = {
+    # YAKE groups candidates by lemma
+    "keywords_extraction": {"sents", "pos", "lemma"},
+    "analyzed_text": {"sents", "pos", "lemma", "morph"},
+    "gender_analyzer": {"sents", "pos", "morph"},
+    "defs_examples": {"pos", "lemma"},
+    "morphology": {"pos", "tag", "lemma", "morph"},
+    "freq_count": {"pos"},
+    "ner_viz": {"sents", "ents"},
+    "tok_table": {"sents", "pos", "tag", "dep"},
+    "corpus_profile": set(),
+}
+
+# Components that set each doc attribute
+ATTR_COMPONENTS = {
+    "sents": {"parser", "senter", "sentencizer"},
+    "pos": {"tagger", "morphologizer", "attribute_ruler"},
+    "tag": {"tagger", "morphologizer"},
+    "morph": {"morphologizer", "attribute_ruler"},
+    "lemma": {"lemmatizer", "trainable_lemmatizer"},
+    "dep": {"parser"},
+    "ents": {"ner", "entity_ruler"},
+    # ginza
+    "compound": {"compound_splitter"},
+    "bunsetu": {"bunsetu_recognizer"},
+}
+
+# Doc attributes that components read
+COMPONENT_REQUIRES = {
+    "lemmatizer": {"pos"},
+    "attribute_ruler": {"tag"},
+    "compound_splitter": {"dep"},
+    "bunsetu_recognizer": {"pos", "dep"},
+}
+
+EMBEDDERS = ("tok2vec", "transformer")
+# Doc attributes that each component sets
+COMPONENT_ATTRS = {}
+for attr, components in ATTR_COMPONENTS.items():
+    for name in components:
+        COMPONENT_ATTRS.setdefault(name, set()).add(attr)
+
+
+def required_pipes(nlp, features):
+    """Return the names of the components needed for `features`, in pipeline order."""
+    attrs = set().union(*(FEATURE_ATTRS.get(feature, set()) for feature in features))
+    pipe_names = set(nlp.pipe_names)
+    needed = set()
+    while True:
+        components = set().union(*(ATTR_COMPONENTS[attr] for attr in attrs)) & pipe_names
+        new_attrs = set().union(*(COMPONENT_REQUIRES.get(name, set()) for name in components))
+        needed |= components
+        if new_attrs <= attrs:
+            break
+        attrs |= new_attrs
+    for name in EMBEDDERS:
+        if name in pipe_names:
+            listeners = getattr(nlp.get_pipe(name), "listening_components", [])
+            if needed & set(listeners):
+                needed.add(name)
+    return [name for name in nlp.pipe_names if name in needed]
+
+
+def _rerun_pipes(nlp, missing, applied):
+    """Return `missing` and the later `applied` components that use what they set."""
+    rerun = set()
+    attrs = set()
+    for name in nlp.pipe_names:
+        sets = COMPONENT_ATTRS.get(name, set())
+        touched = COMPONENT_REQUIRES.get(name, set()) | sets
+        if name in missing or (name in applied and attrs & touched):
+            rerun.add(name)
+            attrs |= sets
+    return rerun
+
+
+def _run(nlp, doc, names):
+    for name, proc in nlp.pipeline:
+        if name in names:
+            with span(f"nlp/{name}"):
+                doc = proc(doc)
+    return doc
+
+
+def get_doc(nlp, text, features, key="doc"):
+    """Return the doc of `text` with at least the components `features` need."""
+    needed = required_pipes(nlp, features)
+    cached = st.session_state.get(key)
+    if cached is None or cached["nlp"] is not nlp or cached["text"] != text:
+        with span("nlp/tokenizer"):
+            doc = nlp.make_doc(text)
+        doc = _run(nlp, doc, needed)
+        cached = {"nlp": nlp, "text": text, "doc": doc, "applied": set(needed)}
+        st.session_state[key] = cached
+        return doc
+
+    doc, applied = cached["doc"], cached["applied"]
+    missing = {name for name in needed if name not in applied}
+    if missing:
+        cached["doc"] = doc = _run(nlp, doc, _rerun_pipes(nlp, missing, applied))
+        applied.update(needed)
+    return doc
@@ -0,0 +1,130 @@
+"""Vocabulary difficulty profiles of Chinese texts over the TOCFL levels.
+
+Each document is segmented with jieba, its tokens are joined against the
+TOCFL index in bulk, and one row of statistics is emitted per document:
+token and type counts, the number of tokens per level, the share of
+tokens found in the word list (coverage) and the share that isn't
+(out-of-list rate). Documents are streamed, so a corpus never has to fit
+in memory, and can be spread over several processes.
+
+    python -m utils.profiler passages/ -o profile.parquet -j 8
+"""
+from argparse import ArgumentParser
+from multiprocessing import cpu_count, get_context
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import jieba
+from utils.tocfl import LEVELS, get_index
+
+# Only tokens with at least one Chinese character are counted
+re_han = re.compile("[\u4E00-\u9FD5]")
+
+
+def profile_text(text, index=None):
+    """Return the difficulty profile of a single text as a dict."""
+    index = index or get_index()
+    tokens = [tok for tok in jieba.cut(text) if re_han.search(tok)]
+    get = index.word_index.get
+    rows = np.fromiter((get(tok, -1) for tok in tokens), dtype=np.int64, count=len(tokens))
+    found = rows >= 0
+    histogram = np.bincount(index.level_codes[rows[found]], minlength=len(LEVELS))
+    num_tokens = len(tokens)
+    types = set(tokens)
+    coverage = float(found.mean()) if num_tokens else 0.0
+    profile = {
+        "tokens": num_tokens,
+        "types": len(types),
+        "coverage": coverage,
+        "oov_rate": 1.0 - coverage if num_tokens else 0.0,
+        "type_coverage": sum(1 for tok in types if tok in index.word_index) / len(types) if types else 0.0,
+    }
+    profile.update(zip(LEVELS, histogram.tolist()))
+    return profile
+
+
+def _profile_item(item):
+    doc_id, text = item
+    profile = profile_text(text)
+    profile["doc_id"] = doc_id
+    return profile
+
+
+def profile_documents(docs, n_jobs=1, chunksize=16):
+    """Yield one profile per (doc_id, text) pair of `docs`, in input order.
+
+    With n_jobs other than 1 (0 for all cores), the documents are spread
+    over forked processes, which only works on posix.
+    """
+    # Build the shared state before forking so that workers inherit it
+    get_index()
+    jieba.initialize()
+    if n_jobs == 1:
+        for item in docs:
+            yield _profile_item(item)
+    else:
+        if os.name == "nt":
+            raise NotImplementedError("Profiling in parallel only supports posix systems")
+        # Fork whatever the default start method is, or the workers would
+        # rebuild the index and reload jieba's default dictionary
+        with get_context("fork").Pool(n_jobs or cpu_count()) as pool:
+            for profile in pool.imap(_profile_item, docs, chunksize):
+                yield profile
+
+
+def profile_table(docs, n_jobs=1):
+    columns = ["doc_id", "tokens", "types", "coverage", "oov_rate", "type_coverage"] + LEVELS
+    return pd.DataFrame(profile_documents(docs, n_jobs), columns=columns)
+
+
+def iter_files(paths, by_line=False):
+    """Yield (doc_id, text) pairs from files and directories of .txt files."""
+    for path in paths:
+        if os.path.isdir(path):
+            filenames = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names if name.endswith(".txt")
+            )
+        else:
+            filenames = [path]
+        for filename in filenames:
+            with open(filename, encoding="utf-8") as f:
+                if by_line:
+                    for lineno, line in enumerate(f, 1):
+                        if line.strip():
+                            yield f"{filename}:{lineno}", line
+                else:
+                    yield filename, f.read()
+
+
+def write_table(table, path):
+    if path.endswith(".parquet"):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+def main():
+    parser = ArgumentParser(description="Profile the TOCFL vocabulary levels of Chinese texts.")
+    parser.add_argument("paths", nargs="+", help="text files or directories of .txt files")
+    parser.add_argument("-o", "--output", required=True, help="output .parquet or .csv file")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument("-l", "--by-line", action="store_true",
+                        help="treat each non-empty line as a separate document")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print jieba loading messages")
+    args = parser.parse_args()
+
+    if args.quiet:
+        jieba.setLogLevel(60)
+    table = profile_table(iter_files(args.paths, args.by_line), args.jobs)
+    write_table(table, args.output)
+    print(f"Wrote profiles of {len(table)} documents to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
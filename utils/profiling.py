@@ -0,0 +1,206 @@
+"""Timing spans of page reruns, aggregated into per-process histograms.
+
+Profiling is off unless the PROFILING environment variable is set, e.g.
+
+    PROFILING=1 streamlit run app.py
+
+When it is off, `span` returns a shared context manager that does nothing,
+so the instrumented code costs about one function call per span. When it
+is on, every span adds its duration to the histogram of its page and
+name. Spans opened while a rerun is tracked (between `start_run` and
+`finish_run`) are also listed for that rerun: `finish_run` logs them on
+one line and shows them with the histograms in a "profiling" expander of
+the sidebar. `metrics_text` renders all histograms in the Prometheus text
+format, which is written after each rerun to the file named by
+PROFILING_TEXTFILE if set, e.g. for the textfile collector of the node
+exporter.
+
+The tracked rerun is kept in a context variable. Work that a page hands
+to other threads is counted towards its rerun when it runs in a copy of
+the page's context, e.g. `executor.submit(contextvars.copy_context().run,
+func, arg)`.
+
+Span names are "model_load", "nlp/<component>", "section/<feature>" and
+"api/<service>".
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import contextvars
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+ENABLED = os.environ.get("PROFILING", "") not in ("", "0")
+TEXTFILE = os.environ.get("PROFILING_TEXTFILE")
+# Upper bounds of the histogram buckets in seconds, the last one being +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+METRIC = "page_span_seconds"
+
+logger = logging.getLogger(__name__)
+
+_HISTOGRAMS = {}
+_LOCK = threading.Lock()
+_run = contextvars.ContextVar("profiling_run", default=None)
+
+
+class Histogram:
+    """Counts of durations per bucket, with their sum."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Estimate the `q` quantile by interpolating within its bucket, like Prometheus."""
+        if not self.count:
+            return float("nan")
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = BUCKETS[i - 1] if i else 0.0
+                if BUCKETS[i] == float("inf"):
+                    return lower
+                return lower + (BUCKETS[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return BUCKETS[-2]
+
+
+def observe(name, seconds):
+    """Add a duration of `seconds` to the histogram of `name` and to the tracked rerun."""
+    run = _run.get()
+    page = run["page"] if run is not None else ""
+    with _LOCK:
+        histogram = _HISTOGRAMS.get((page, name))
+        if histogram is None:
+            histogram = _HISTOGRAMS[(page, name)] = Histogram()
+        histogram.observe(seconds)
+    if run is not None:
+        run["spans"].append((name, seconds))
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextmanager
+def _span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def span(name):
+    """Time the body of a `with` block as `name`."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _span(name)
+
+
+def start_run(page):
+    """Start tracking the spans of a rerun of `page`."""
+    if ENABLED:
+        _run.set({"page": page, "spans": [], "start": time.perf_counter()})
+
+
+def finish_run():
+    """Record the rerun started by `start_run`, log it and show the sidebar panel."""
+    run = _run.get()
+    if run is None:
+        return
+    observe("run", time.perf_counter() - run["start"])
+    _run.set(None)
+    logger.info("profiling %s %s", run["page"],
+                " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in run["spans"]))
+    if TEXTFILE:
+        write_metrics(TEXTFILE)
+    show_panel(run)
+
+
+def snapshot():
+    """Return a copy of the histograms keyed by (page, span name)."""
+    with _LOCK:
+        copies = {}
+        for key, histogram in _HISTOGRAMS.items():
+            copy = copies[key] = Histogram()
+            copy.counts = list(histogram.counts)
+            copy.count = histogram.count
+            copy.sum = histogram.sum
+        return copies
+
+
+def metrics_text():
+    """Render the histograms in the Prometheus text exposition format."""
+    lines = [f"# HELP {METRIC} Duration of the spans of page reruns.", f"# TYPE {METRIC} histogram"]
+    for (page, name), histogram in sorted(snapshot().items()):
+        labels = f'page="{page}",span="{name}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{METRIC}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{METRIC}_sum{{{labels}}} {histogram.sum!r}")
+        lines.append(f"{METRIC}_count{{{labels}}} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    """Write `metrics_text` to `path` atomically, so that scrapers never read half a file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(metrics_text())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def summary_table(page=None):
+    rows = []
+    for (span_page, name), histogram in sorted(snapshot().items()):
+        if page is not None and span_page != page:
+            continue
+        rows.append({
+            "span": name,
+            "count": histogram.count,
+            "mean_ms": histogram.sum / histogram.count * 1000,
+            "p50_ms": histogram.quantile(0.5) * 1000,
+            "p95_ms": histogram.quantile(0.95) * 1000,
+        })
+    return pd.DataFrame(rows, columns=["span", "count", "mean_ms", "p50_ms", "p95_ms"])
+
+
+def show_panel(run):
+    with st.sidebar.expander("profiling"):
+        st.markdown("##### 本次執行")
+        last_run = pd.DataFrame(run["spans"], columns=["span", "seconds"])
+        last_run["ms"] = last_run.pop("seconds") * 1000
+        st.dataframe(last_run.round(1), hide_index=True)
+        st.markdown("##### 本頁累計")
+        st.dataframe(summary_table(run["page"]).round(1), hide_index=True)
+        st.download_button(
+            label="下載 Prometheus 指標",
+            data=metrics_text().encode("utf-8"),
+            file_name="metrics.prom",
+        )
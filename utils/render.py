@@ -0,0 +1,47 @@
+"""Paginated rendering of sentence-by-sentence sections.
+
+Writing every sentence with its own `st.write` sends one websocket delta
+per sentence. Here the first page of sentences is formatted and sent as a
+single markdown block, and further pages are only formatted when the
+reader asks for them with the "載入更多" button. The number of sentences
+shown is kept in the session together with a hash of the text, and goes
+back to one page when the text changes.
+"""
+from hashlib import blake2b
+from itertools import islice
+
+import streamlit as st
+
+PAGE_SIZE = 50
+LINE_BREAK = "  \n"
+
+
+def _load_more(limit_key, page_size):
+    st.session_state[limit_key] += page_size
+
+
+def render_sentences(doc, format_sentence, key, prepare=None, page_size=PAGE_SIZE):
+    """Render the first pages of the sentences of `doc`, one markdown block per page.
+
+    `format_sentence(idx, sent)` returns the line of a sentence and is only
+    called for the sentences on screen. `prepare(sents)` is called once
+    with those sentences before formatting, e.g. to batch lookups.
+    """
+    limit_key = f"{key}_limit"
+    text_key = f"{key}_text"
+    text_hash = blake2b(doc.text.encode("utf-8"), digest_size=16).digest()
+    if st.session_state.get(text_key) != text_hash or limit_key not in st.session_state:
+        st.session_state[text_key] = text_hash
+        st.session_state[limit_key] = page_size
+    limit = st.session_state[limit_key]
+
+    shown = list(islice(doc.sents, limit + 1))
+    has_more = len(shown) > limit
+    shown = shown[:limit]
+    if prepare is not None:
+        prepare(shown)
+    lines = [format_sentence(idx, sent) for idx, sent in enumerate(shown)]
+    for start in range(0, len(lines), page_size):
+        st.markdown(LINE_BREAK.join(lines[start:start + page_size]))
+    if has_more:
+        st.button("載入更多", key=f"{key}_more", on_click=_load_more, args=(limit_key, page_size))
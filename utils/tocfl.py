@@ -0,0 +1,78 @@
+"""Columnar TOCFL word list with a hash index on 詞彙.
+
+The CSV is parsed once into NumPy arrays, one per column, plus a dict
+from word to row number. Slash-separated variants such as 姊姊/姐姐 are
+indexed under each form. Looking up a whole doc is a single batch call
+that returns the matching rows in table order.
+"""
+import csv
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tocfl_wordlist.csv")
+COLUMNS = "詞彙 漢語拼音 注音 任務領域 詞條分級".split()
+LEVELS = ["準備1", "準備2", "入門", "基礎", "進階", "高階", "流利"]
+
+# Bracketed annotations in variants, e.g. 喂(ㄨㄟˊ)
+re_annotation = re.compile(r"\(.*?\)")
+
+_INDEX = None
+_LOCK = threading.Lock()
+
+
+class TocflIndex:
+
+    def __init__(self, filename=DEFAULT_PATH):
+        with open(filename, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.columns = {
+            col: np.array([row[col].strip() for row in rows], dtype=object)
+            for col in COLUMNS
+        }
+        self.level_codes = np.array([LEVELS.index(level) for level in self.columns["詞條分級"]], dtype=np.int8)
+        self.word_index = {}
+        for idx, word in enumerate(self.columns["詞彙"]):
+            self.word_index.setdefault(word, idx)
+            for variant in word.split("/"):
+                variant = re_annotation.sub("", variant)
+                if variant:
+                    self.word_index.setdefault(variant, idx)
+
+    def __repr__(self):
+        return f"<TocflIndex words={len(self)}>"
+
+    def __len__(self):
+        return len(self.level_codes)
+
+    def rows_for(self, tokens):
+        """Return the sorted, unique row numbers of all `tokens` in the word list."""
+        get = self.word_index.get
+        rows = np.fromiter((get(tok, -1) for tok in set(tokens)), dtype=np.int64)
+        return np.unique(rows[rows >= 0])
+
+    def levels_for(self, tokens):
+        """Return level, pinyin, zhuyin and domain of all `tokens` found in the list.
+
+        The result is indexed by row number, in table order.
+        """
+        rows = self.rows_for(tokens)
+        return pd.DataFrame({col: values[rows] for col, values in self.columns.items()}, index=rows)
+
+    def level_counts(self, rows):
+        """Count the levels of `rows`, skipping the levels that don't occur."""
+        counts = np.bincount(self.level_codes[np.asarray(rows, dtype=np.int64)], minlength=len(LEVELS))
+        counts = pd.Series(counts, index=LEVELS)
+        return counts[counts > 0]
+
+
+def get_index(filename=DEFAULT_PATH):
+    """Return the per-process TOCFL index, building it on first use."""
+    global _INDEX
+    with _LOCK:
+        if _INDEX is None:
+            _INDEX = TocflIndex(filename)
+    return _INDEX
@@ -0,0 +1,85 @@
+"""Memoized pinyin, zhuyin and IPA transcriptions of Chinese words.
+
+Readings are cached per word and per system, so frequent words like 我 and
+的 are converted once per process instead of once per token and rerun.
+The cache can be seeded with the readings of the TOCFL word list, and a
+whole sentence is transcribed with one batch call over its unique tokens.
+Pinyin comes from the word-level table of `utils.pinyin_table` when it has
+been built, and from dragonmapper for the words it doesn't cover.
+"""
+import threading
+
+from dragonmapper import hanzi, transcriptions
+
+SYSTEMS = ("pinyin", "zhuyin", "ipa")
+
+# Some TOCFL entries use breves instead of carons for the third tone
+BREVE_TO_CARON = str.maketrans("ăĕĭŏŭ", "ǎěǐǒǔ")
+# Full-width and private use characters that TOCFL uses between zhuyin syllables
+ZHUYIN_SEPARATORS = str.maketrans({"\u3000": " ", "\uf8f8": " "})
+
+
+class TranscriptionService:
+
+    def __init__(self, tocfl_index=None, pinyin_table=None):
+        self.lock = threading.Lock()
+        self.pinyin_table = pinyin_table
+        self.cache = {system: {} for system in SYSTEMS}
+        self.hits = 0
+        self.misses = 0
+        if tocfl_index is not None:
+            self.preload(tocfl_index)
+
+    def __repr__(self):
+        return f"<TranscriptionService words={len(self.cache['pinyin'])}>"
+
+    def preload(self, tocfl_index):
+        """Seed the cache with the pinyin and zhuyin columns of the TOCFL list.
+
+        Entries with variants or several readings (e.g. 喂(ㄨㄟˊ)/喂) are skipped.
+        """
+        columns = tocfl_index.columns
+        for word, pinyin, zhuyin in zip(columns["詞彙"], columns["漢語拼音"], columns["注音"]):
+            if any(char in word + pinyin for char in "/()"):
+                continue
+            self.cache["pinyin"][word] = pinyin.translate(BREVE_TO_CARON).strip()
+            self.cache["zhuyin"][word] = " ".join(zhuyin.translate(ZHUYIN_SEPARATORS).split())
+
+    def _convert(self, word, system):
+        try:
+            pinyin = self.cache["pinyin"].get(word)
+            if pinyin is None and self.pinyin_table is not None:
+                pinyin = self.pinyin_table.get(word)
+            if pinyin is None:
+                pinyin = hanzi.to_pinyin(word)
+            if system == "pinyin":
+                return pinyin
+            elif system == "zhuyin":
+                return transcriptions.pinyin_to_zhuyin(pinyin)
+            else:
+                return transcriptions.pinyin_to_ipa(pinyin)
+        except Exception:
+            # Tokens that aren't Chinese (e.g. Latin letters) are shown as they are
+            return word
+
+    def transcribe(self, words, system="pinyin"):
+        """Return the transcriptions of `words` in `system`, in the same order."""
+        cache = self.cache[system]
+        unique_words = set(words)
+        with self.lock:
+            missing = [word for word in unique_words if word not in cache]
+        converted = {word: self._convert(word, system) for word in missing}
+        with self.lock:
+            cache.update(converted)
+            self.misses += len(converted)
+            self.hits += len(words) - len(converted)
+            return [cache[word] for word in words]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": {system: len(cache) for system, cache in self.cache.items()},
+        }
@@ -0,0 +1,76 @@
+"""Windowed NER and token views for large documents.
+
+Rendering displaCy HTML or a token table for a whole novel is slow on the
+server and heavy in the browser. These helpers let the reader pick a range
+of sentences, at most WINDOW_SIZE of them, and only render that window.
+The token table and the entities are read from the tokens of the window
+only, so their cost doesn't grow with the document.
+"""
+import pandas as pd
+from spacy_streamlit import visualize_ner
+import streamlit as st
+
+WINDOW_SIZE = 20  # sentences
+
+
+def sentence_window(doc, key, window_size=WINDOW_SIZE):
+    """Return the span of the sentences selected with a range slider."""
+    sent_starts = [sent.start for sent in doc.sents]
+    num_sents = len(sent_starts)
+    if num_sents <= window_size:
+        return doc[:]
+    first, last = st.slider(
+        f"請選擇句子範圍 (共 {num_sents} 句，一次最多 {window_size} 句)",
+        1, num_sents, (1, window_size), key=key,
+    )
+    if last - first >= window_size:
+        last = first + window_size - 1
+        st.caption(f"一次最多顯示 {window_size} 句，目前顯示第 {first} 至 {last} 句")
+    end = sent_starts[last] if last < num_sents else len(doc)
+    return doc[sent_starts[first - 1]:end]
+
+
+def get_window_ents(span):
+    """Return displaCy's manual input for the entities of `span`."""
+    # Span.ents and Span.as_doc go through the entities of the whole doc,
+    # so rebuild the entities from the IOB tags of the window's tokens
+    offset = span.start_char
+    ents = []
+    current = None
+    for tok in span:
+        if tok.ent_iob_ == "B" or (tok.ent_iob_ == "I" and current is None):
+            current = {"start": tok.idx - offset, "end": tok.idx + len(tok) - offset, "label": tok.ent_type_}
+            ents.append(current)
+        elif tok.ent_iob_ == "I":
+            current["end"] = tok.idx + len(tok) - offset
+        else:
+            current = None
+    return [{"text": span.text, "ents": ents, "title": None}]
+
+
+def visualize_ner_window(doc, labels, title, key="ner_window"):
+    span = sentence_window(doc, key)
+    visualize_ner(get_window_ents(span), labels=labels, show_table=False, title=title, key=key, manual=True)
+
+
+def get_token_table(span):
+    # Doc.to_array and Span.as_doc both convert the whole doc, so read the
+    # window token by token instead
+    tokens = list(span)
+    return pd.DataFrame(
+        {
+            "text": [tok.text for tok in tokens],
+            "pos_": [tok.pos_ for tok in tokens],
+            "tag_": [tok.tag_ for tok in tokens],
+            "dep_": [tok.dep_ for tok in tokens],
+            "head": [tok.head.text for tok in tokens],
+        },
+        index=range(span.start, span.end),
+    )
+
+
+def visualize_tokens_window(doc, title, key="tokens_window"):
+    if title:
+        st.header(title)
+    span = sentence_window(doc, key)
+    st.dataframe(get_token_table(span))
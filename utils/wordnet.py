@@ -0,0 +1,129 @@
+"""Offline synonyms and definitions backed by the installed WordNet data.
+
+Build the table once with
+
+    python -m utils.wordnet
+
+which reads NLTK's WordNet corpus (`nltk.download("wordnet")`) and writes a
+compact (lemma, pos) -> (synonyms, definitions) table to
+`data/wordnet.marshal`. At runtime the table is loaded once per process, so
+lookups are plain dict accesses that never touch the network. Without the
+table, lookups find nothing; the page tells the reader how to build it.
+
+The interface mirrors `utils.free_dict`, so the pages can switch between
+the two sources.
+"""
+from argparse import ArgumentParser
+import marshal
+import os
+import sys
+import tempfile
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_TABLE = os.path.join(DATA_DIR, "wordnet.marshal")
+MAX_SYNONYMS = 10
+MAX_DEFINITIONS = 3
+
+# spaCy UPOS tags -> WordNet POS
+POS_MAP = {
+    "NOUN": "n",
+    "VERB": "v",
+    "ADJ": "a",
+    "ADV": "r",
+}
+
+_TABLE = None
+_LOCK = threading.Lock()
+
+
+def build_table():
+    """Build the lookup table from NLTK's WordNet corpus."""
+    from nltk.corpus import wordnet as wn
+
+    table = {}
+    for pos in POS_MAP.values():
+        for name in wn.all_lemma_names(pos):
+            # Synsets are returned in WordNet's sense frequency order
+            synsets = wn.synsets(name, pos)
+            lemma = sys.intern(name.replace("_", " ").lower())
+            synonyms = []
+            for synset in synsets:
+                for syn in synset.lemma_names():
+                    syn = sys.intern(syn.replace("_", " "))
+                    if syn.lower() != lemma and syn not in synonyms:
+                        synonyms.append(syn)
+            definitions = []
+            for synset in synsets[:MAX_DEFINITIONS]:
+                examples = synset.examples()
+                definitions.append((synset.definition(), examples[0] if examples else None))
+            table[(lemma, pos)] = (tuple(synonyms[:MAX_SYNONYMS]), tuple(definitions))
+    return table
+
+
+def write_table(table, table_path=DEFAULT_TABLE):
+    os.makedirs(os.path.dirname(os.path.abspath(table_path)), exist_ok=True)
+    # Write to a temp file first so concurrent readers never see a partial dump
+    fd, fpath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(table_path)))
+    with os.fdopen(fd, "wb") as temp_file:
+        marshal.dump(table, temp_file)
+    os.replace(fpath, table_path)
+
+
+def load_table(table_path=DEFAULT_TABLE):
+    """Load the table once per process, or return None if it hasn't been built."""
+    global _TABLE
+    if _TABLE is not None:
+        return _TABLE
+    with _LOCK:
+        if _TABLE is None and os.path.isfile(table_path):
+            with open(table_path, "rb") as f:
+                _TABLE = marshal.load(f)
+    return _TABLE
+
+
+def _lookup(word, pos):
+    wn_pos = POS_MAP.get(pos.upper())
+    if wn_pos is None:
+        return None
+    table = load_table()
+    if table is None:
+        return None
+    return table.get((word.lower(), wn_pos))
+
+
+def prefetch(words):
+    """Make sure the table is loaded. Lookups are local, so there is nothing to batch."""
+    load_table()
+
+
+def get_synonyms(word, pos):
+    entry = _lookup(word, pos)
+    if entry is None:
+        return None
+    return list(entry[0])
+
+
+def get_definitions(word, pos):
+    """Return a list of (definition, example) pairs, or None if not found."""
+    entry = _lookup(word, pos)
+    if entry is None:
+        return None
+    return list(entry[1])
+
+
+def main():
+    parser = ArgumentParser(description="Build the WordNet synonym and definition table.")
+    parser.add_argument("-o", "--output", default=DEFAULT_TABLE, help="output path of the table")
+    args = parser.parse_args()
+
+    try:
+        table = build_table()
+    except LookupError:
+        sys.exit("NLTK's WordNet corpus is missing, download it with nltk.download(\"wordnet\")")
+    write_table(table, args.output)
+    print(f"Wrote {len(table)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()